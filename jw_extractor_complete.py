@@ -1,9 +1,27 @@
 import requests
 from bs4 import BeautifulSoup
 import re
+import os
 import json
-from typing import Optional, Dict, List, Tuple
-from datetime import datetime
+import time
+import hashlib
+import contextlib
+import tracemalloc
+import argparse
+import random
+import threading
+import queue
+import sqlite3
+import socket
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturosTimeout
+from collections import deque
+from urllib.parse import urljoin, urlsplit, urlunsplit, urlparse, parse_qs, quote, unquote
+from typing import Optional, Dict, List, Tuple, NamedTuple
+import bisect
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, date
 import pandas as pd
 
 # Para Google Sheets
@@ -34,6 +52,38 @@ HEADERS = {
 TIMEOUT = 30
 MAX_REINTENTOS = 3
 
+# Timeouts adaptativos: se derivan de las latencias observadas (ventana móvil)
+VENTANA_LATENCIAS = 200
+MUESTRAS_MINIMAS = 20
+FACTOR_TIMEOUT = 4.0          # timeout = FACTOR_TIMEOUT × p99, acotado a [TIMEOUT_MINIMO, TIMEOUT]
+TIMEOUT_MINIMO = 2.0
+TASA_MAX_COBERTURA = 0.1      # máximo de peticiones duplicadas (fracción del total)
+
+# Cuota de la API de Sheets (lecturas/escrituras por minuto por usuario)
+SHEETS_CUOTA_POR_MINUTO = 60
+SHEETS_MAX_REINTENTOS = 5
+SHEETS_MARGEN_VENTANA = 1.0   # segundos extra de ventana: la de Google no coincide con nuestro reloj
+
+# Diario de semanas completadas para reanudar ejecuciones interrumpidas
+ARCHIVO_CHECKPOINT = "reuniones_checkpoint.jsonl"
+
+# Cancionero "Cantemos con gozo a Jehová" (títulos de canciones)
+URL_CANCIONERO = "https://www.jw.org/es/biblioteca/musica-canciones/cantemos-con-gozo/"
+ARCHIVO_CANCIONERO = "cancionero_cache.json"
+TTL_CANCIONERO = 90 * 24 * 3600  # segundos
+
+# Modo vigilancia: estado persistente y frecuencia de consulta del índice
+ARCHIVO_ESTADO_VIGILANCIA = "reuniones_vigilancia.json"
+INTERVALO_VIGILANCIA = 600  # segundos
+
+# Cola de trabajo distribuida (coordinador/trabajadores)
+VISIBILIDAD_LEASE = 300       # segundos antes de que una semana tomada vuelva a la cola
+MAX_INTENTOS_COLA = 3         # veces que se reparte una semana antes de darla por fallida
+
+# Copia JSON de la última extracción (fuente de la API de lectura)
+ARCHIVO_DATOS_JSON = "reuniones_datos.json"
+PUERTO_API = 8080
+
 LIBROS_BIBLIA = (
     'ECLESIASTÉS', 'GÉNESIS', 'ÉXODO', 'LEVÍTICO', 'NÚMEROS', 'DEUTERONOMIO',
     'JOSUÉ', 'JUECES', 'RUT', 'SAMUEL', 'REYES', 'CRÓNICAS', 'ESDRAS',
@@ -47,6 +97,32 @@ LIBROS_BIBLIA = (
     'SANTIAGO', 'PEDRO', 'JUDAS', 'APOCALIPSIS'
 )
 
+# Canon en orden (el id de cada libro es su posición desde 1) y número de capítulos
+LIBROS_CANONICOS = (
+    ('GÉNESIS', 50), ('ÉXODO', 40), ('LEVÍTICO', 27), ('NÚMEROS', 36), ('DEUTERONOMIO', 34),
+    ('JOSUÉ', 24), ('JUECES', 21), ('RUT', 4), ('1 SAMUEL', 31), ('2 SAMUEL', 24),
+    ('1 REYES', 22), ('2 REYES', 25), ('1 CRÓNICAS', 29), ('2 CRÓNICAS', 36), ('ESDRAS', 10),
+    ('NEHEMÍAS', 13), ('ESTER', 10), ('JOB', 42), ('SALMOS', 150), ('PROVERBIOS', 31),
+    ('ECLESIASTÉS', 12), ('CANTARES', 8), ('ISAÍAS', 66), ('JEREMÍAS', 52), ('LAMENTACIONES', 5),
+    ('EZEQUIEL', 48), ('DANIEL', 12), ('OSEAS', 14), ('JOEL', 3), ('AMÓS', 9),
+    ('ABDÍAS', 1), ('JONÁS', 4), ('MIQUEAS', 7), ('NAHÚM', 3), ('HABACUC', 3),
+    ('SOFONÍAS', 3), ('HAGEO', 2), ('ZACARÍAS', 14), ('MALAQUÍAS', 4),
+    ('MATEO', 28), ('MARCOS', 16), ('LUCAS', 24), ('JUAN', 21), ('HECHOS', 28),
+    ('ROMANOS', 16), ('1 CORINTIOS', 16), ('2 CORINTIOS', 13), ('GÁLATAS', 6), ('EFESIOS', 6),
+    ('FILIPENSES', 4), ('COLOSENSES', 4), ('1 TESALONICENSES', 5), ('2 TESALONICENSES', 3),
+    ('1 TIMOTEO', 6), ('2 TIMOTEO', 4), ('TITO', 3), ('FILEMÓN', 1), ('HEBREOS', 13),
+    ('SANTIAGO', 5), ('1 PEDRO', 5), ('2 PEDRO', 3), ('1 JUAN', 5), ('2 JUAN', 1),
+    ('3 JUAN', 1), ('JUDAS', 1), ('APOCALIPSIS', 22)
+)
+
+# Tipos de parte recurrentes para el informe analítico
+TIPOS_PARTE = (
+    'Busquemos perlas escondidas', 'Lectura de la Biblia', 'Empiece conversaciones',
+    'Haga revisitas', 'Haga discípulos', 'Explique sus creencias', 'Discurso',
+    'Estudio bíblico de la congregación', 'Necesidades de la congregación',
+    'Logros de la organización', 'Canción del Reino y oración final'
+)
+
 PATRONES = {
     'fecha': re.compile(r'\d{1,2}\s*(?:-\s*\d{1,2}|de\s+\w+\s+(?:a|al)\s+\d{1,2})\s+de\s+\w+', re.IGNORECASE),
     'cancion': re.compile(r'Canción\s+(\d+)', re.IGNORECASE),
@@ -56,34 +132,64 @@ PATRONES = {
 }
 
 # ==================== FUNCIONES PARA EXTRAER ENLACES ====================
+def canonicalizar_url(href: str, base: str = '') -> str:
+    """Forma canónica de una URL de semana.
+    
+    Absoluta, esquema y host en minúsculas (https://www.jw.org para jw.org),
+    sin puerto por defecto, query ni fragmento, y con barra final.
+    """
+    partes = urlsplit(urljoin(base, href.strip()))
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+    puerto = partes.port
+    
+    if host in ('jw.org', 'www.jw.org'):
+        esquema, host, puerto = 'https', 'www.jw.org', None
+    if (esquema, puerto) in (('http', 80), ('https', 443)):
+        puerto = None
+    
+    ruta = quote(unquote(re.sub(r'/{2,}', '/', partes.path)), safe="/:@-._~!$&'()*+,;=")
+    if not ruta.endswith('/'):
+        ruta += '/'
+    
+    return urlunsplit((esquema, f"{host}:{puerto}" if puerto else host, ruta, '', ''))
+
+def extraer_enlaces_html(html: bytes, url_indice: str) -> List[Dict[str, str]]:
+    """Extrae los enlaces de semanas del HTML de la página índice, sin duplicados."""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    enlaces = []
+    vistas = set()
+    url_indice_canonica = canonicalizar_url(url_indice)
+    
+    main_content_div = soup.find('div', class_='docPart')
+    if main_content_div:
+        links = main_content_div.find_all('a', href=True)
+    else:
+        links = soup.find_all('a', href=True)
+    
+    for link in links:
+        href = link.get('href')
+        texto = link.get_text(strip=True)
+        
+        if '/es/biblioteca/guia-actividades-reunion-testigos-jehova/' in href and texto:
+            # Miniatura y título suelen enlazar la misma semana en formas distintas
+            url = canonicalizar_url(href, url_indice)
+            if url != url_indice_canonica and not url.endswith('/mwb/') and url not in vistas:
+                if PATRONES['fecha'].search(texto):
+                    vistas.add(url)
+                    enlaces.append({'titulo': texto, 'url': url})
+    
+    enlaces.sort(key=lambda x: extraer_fecha_para_ordenar(x['titulo']))
+    return enlaces
+
 def obtener_enlaces_semanas(url_indice: str) -> List[Dict[str, str]]:
     """Extrae todos los enlaces de semanas desde la URL índice."""
     try:
         print("🔍 Buscando todas las semanas disponibles...\n")
-        response = requests.get(url_indice, headers=HEADERS, timeout=TIMEOUT)
+        response = requests.get(url_indice, headers=HEADERS, timeout=timeout_con_plazo())
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        enlaces = []
-        
-        main_content_div = soup.find('div', class_='docPart')
-        if main_content_div:
-            links = main_content_div.find_all('a', href=True)
-        else:
-            links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link.get('href')
-            texto = link.get_text(strip=True)
-            
-            if '/es/biblioteca/guia-actividades-reunion-testigos-jehova/' in href and texto:
-                if href != url_indice and not href.endswith('/mwb/'):
-                    if PATRONES['fecha'].search(texto):
-                        if not href.startswith('http'):
-                            href = f"https://www.jw.org{href}"
-                        enlaces.append({'titulo': texto, 'url': href})
-        
-        enlaces.sort(key=lambda x: extraer_fecha_para_ordenar(x['titulo']))
+        enlaces = extraer_enlaces_html(response.content, url_indice)
         
         print(f"✅ Se encontraron {len(enlaces)} semanas\n")
         return enlaces
@@ -108,6 +214,37 @@ def extraer_fecha_para_ordenar(titulo: str) -> tuple:
         return (mes, dia)
     return (0, 0)
 
+def fecha_inicio_semana(datos: Dict) -> Optional[date]:
+    """Fecha del primer día de la semana, con el año tomado de la URL de la semana.
+    
+    Se prefiere el año que sigue al mes en la URL ('30-de-diciembre-de-2024');
+    si no, el del número ('enero-febrero-2025-mwb'), restando uno a las semanas
+    de diciembre que aparecen en un número que empieza en enero.
+    """
+    mes, dia = extraer_fecha_para_ordenar(datos.get('fecha', ''))
+    if not mes:
+        return None
+    
+    url = datos.get('_url', '').lower()
+    meses = ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+             'septiembre', 'octubre', 'noviembre', 'diciembre')
+    anio_match = re.search(rf'{meses[mes - 1]}(?:-de)?-(20\d{{2}})', url)
+    numero_match = re.search(r'([a-z]+)(?:-[a-z]+)?-(20\d{2})-mwb', url)
+    if anio_match:
+        anio = int(anio_match.group(1))
+    elif numero_match:
+        anio = int(numero_match.group(2))
+        if numero_match.group(1) in meses and mes - (meses.index(numero_match.group(1)) + 1) > 6:
+            anio -= 1
+    else:
+        anio_match = re.search(r'(20\d{2})', url)
+        anio = int(anio_match.group(1)) if anio_match else datetime.now().year
+    
+    try:
+        return date(anio, mes, dia)
+    except ValueError:
+        return None
+
 def mostrar_semanas_disponibles(enlaces: List[Dict[str, str]]) -> None:
     """Muestra las semanas disponibles."""
     if not enlaces:
@@ -120,20 +257,227 @@ def mostrar_semanas_disponibles(enlaces: List[Dict[str, str]]) -> None:
     print()
 
 # ==================== FUNCIONES DE EXTRACCIÓN ====================
+class EstadisticasDescarga:
+    """Registro de cada intento de descarga: URL, latencia y resultado."""
+    
+    def __init__(self):
+        self.intentos: List[Tuple[str, float, str]] = []
+        self._lock = threading.Lock()
+    
+    def registrar(self, url: str, segundos: float, resultado: str) -> None:
+        with self._lock:
+            self.intentos.append((url, segundos, resultado))
+    
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.intentos = []
+
+ESTADISTICAS_DESCARGA = EstadisticasDescarga()
+
+class PlazoAgotado(Exception):
+    """Se alcanzó la fecha límite global de la ejecución."""
+
+class Plazo:
+    """Fecha límite global de la ejecución (sin límite si `segundos` es None)."""
+    
+    def __init__(self, segundos: Optional[float] = None):
+        self.fin = time.monotonic() + segundos if segundos else None
+    
+    def restante(self) -> Optional[float]:
+        """Segundos que quedan, o None si no hay límite."""
+        return None if self.fin is None else self.fin - time.monotonic()
+    
+    def vencido(self) -> bool:
+        return self.fin is not None and time.monotonic() >= self.fin
+
+PLAZO_EJECUCION = Plazo()
+
+def establecer_plazo(segundos: Optional[float]) -> Plazo:
+    """Fija la fecha límite que respetan todas las descargas."""
+    global PLAZO_EJECUCION
+    PLAZO_EJECUCION = Plazo(segundos)
+    return PLAZO_EJECUCION
+
+def timeout_con_plazo(timeout: Optional[float] = None) -> float:
+    """Timeout de una petición, recortado a lo que queda del plazo global."""
+    timeout = timeout or TIMEOUT
+    restante = PLAZO_EJECUCION.restante()
+    if restante is None:
+        return timeout
+    if restante <= 0:
+        raise PlazoAgotado("plazo de ejecución agotado")
+    return min(timeout, restante)
+
+def leer_con_plazo(response: requests.Response) -> bytes:
+    """Lee el cuerpo por trozos, abortando si vence el plazo (cuerpos lentos)."""
+    trozos = []
+    for trozo in response.iter_content(64 * 1024):
+        trozos.append(trozo)
+        if PLAZO_EJECUCION.vencido():
+            raise PlazoAgotado("plazo de ejecución agotado durante la descarga")
+    return b''.join(trozos)
+
+class LatenciaAdaptativa:
+    """Distribución de latencias recientes para timeouts adaptativos y peticiones cubiertas.
+    
+    Con `adaptativo`, el timeout de cada petición es FACTOR_TIMEOUT veces el
+    p99 observado. Con `cobertura`, una petición que supera el p95 lanza una
+    copia y se usa la primera respuesta; las copias se limitan a `tasa_max`
+    del total de peticiones.
+    """
+    
+    def __init__(self, adaptativo: bool = False, cobertura: bool = False,
+                 ventana: int = VENTANA_LATENCIAS, tasa_max: float = TASA_MAX_COBERTURA):
+        self.adaptativo = adaptativo
+        self.cobertura = cobertura
+        self.tasa_max = tasa_max
+        self.latencias: deque = deque(maxlen=ventana)
+        self.peticiones = 0
+        self.coberturas = 0
+        self.coberturas_ganadas = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def activo(self) -> bool:
+        return self.adaptativo or self.cobertura
+    
+    def observar(self, segundos: float) -> None:
+        with self._lock:
+            self.latencias.append(segundos)
+    
+    def percentil(self, p: float) -> Optional[float]:
+        """Percentil p (0-100) de la ventana, o None con pocas muestras."""
+        with self._lock:
+            if len(self.latencias) < MUESTRAS_MINIMAS:
+                return None
+            ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))]
+    
+    def timeout(self, intento: int = 1) -> float:
+        """Timeout para el intento indicado; se duplica en cada reintento."""
+        p99 = self.percentil(99) if self.adaptativo else None
+        if p99 is None:
+            return TIMEOUT
+        return min(TIMEOUT, max(TIMEOUT_MINIMO, FACTOR_TIMEOUT * p99) * 2 ** (intento - 1))
+    
+    def umbral_cobertura(self) -> Optional[float]:
+        """Espera antes de lanzar la copia (p95), o None si no se cubre."""
+        return self.percentil(95) if self.cobertura else None
+    
+    def contar_peticion(self) -> None:
+        with self._lock:
+            self.peticiones += 1
+    
+    def autorizar_cobertura(self) -> bool:
+        """Reserva una copia si no se supera la tasa máxima."""
+        with self._lock:
+            if self.coberturas + 1 > self.tasa_max * self.peticiones:
+                return False
+            self.coberturas += 1
+            return True
+    
+    def contar_ganada(self) -> None:
+        with self._lock:
+            self.coberturas_ganadas += 1
+    
+    def mostrar_resumen(self) -> None:
+        if not self.activo:
+            return
+        p50, p95, p99 = (self.percentil(p) for p in (50, 95, 99))
+        if p50 is None:
+            print(f"⏱️ Latencia: muestras insuficientes ({len(self.latencias)})\n")
+            return
+        print(f"⏱️ Latencia p50={p50 * 1000:.0f} ms  p95={p95 * 1000:.0f} ms  p99={p99 * 1000:.0f} ms"
+              f"  → timeout {self.timeout():.1f} s")
+        if self.cobertura:
+            print(f"   Peticiones cubiertas: {self.coberturas}/{self.peticiones}"
+                  f" ({self.coberturas_ganadas} ganadas por la copia)")
+        print()
+
+LATENCIA_DESCARGA = LatenciaAdaptativa()
+_EJECUTOR_COBERTURA: Optional[ThreadPoolExecutor] = None
+_HILOS_COBERTURA = 1
+_LOCK_COBERTURA = threading.Lock()
+
+def configurar_latencia(adaptativo: bool = False, cobertura: bool = False, hilos: int = 1) -> LatenciaAdaptativa:
+    """Reinicia las latencias observadas y activa timeouts adaptativos y/o cobertura.
+    
+    `hilos` (los de descarga) dimensiona el ejecutor de las peticiones cubiertas.
+    """
+    global LATENCIA_DESCARGA, _EJECUTOR_COBERTURA, _HILOS_COBERTURA
+    LATENCIA_DESCARGA = LatenciaAdaptativa(adaptativo, cobertura)
+    with _LOCK_COBERTURA:
+        if _EJECUTOR_COBERTURA is not None and _HILOS_COBERTURA != hilos:
+            _EJECUTOR_COBERTURA.shutdown(wait=False)
+            _EJECUTOR_COBERTURA = None
+        _HILOS_COBERTURA = hilos
+    return LATENCIA_DESCARGA
+
+def _ejecutor_cobertura() -> ThreadPoolExecutor:
+    """Ejecutor compartido de las peticiones cubiertas, creado en el primer uso."""
+    global _EJECUTOR_COBERTURA
+    with _LOCK_COBERTURA:
+        if _EJECUTOR_COBERTURA is None:
+            # Cada hilo de descarga puede tener en vuelo su petición y una copia
+            _EJECUTOR_COBERTURA = ThreadPoolExecutor(max_workers=2 * _HILOS_COBERTURA,
+                                                     thread_name_prefix='cobertura')
+        return _EJECUTOR_COBERTURA
+
+class UnSoloVuelo:
+    """Comparte una única ejecución en curso entre llamadas concurrentes con la misma clave."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso: Dict[str, Dict] = {}
+    
+    def hacer(self, clave: str, funcion):
+        """Ejecuta `funcion` o espera el resultado de la ejecución en curso para `clave`."""
+        with self._lock:
+            vuelo = self._en_curso.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = {'listo': threading.Event(), 'resultado': None, 'error': None}
+                self._en_curso[clave] = vuelo
+        
+        if not lider:
+            vuelo['listo'].wait()
+            if vuelo['error'] is not None:
+                raise vuelo['error']
+            return vuelo['resultado']
+        
+        try:
+            vuelo['resultado'] = funcion()
+            return vuelo['resultado']
+        except BaseException as e:
+            vuelo['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            vuelo['listo'].set()
+
+_VUELOS_DESCARGA = UnSoloVuelo()
+
 def obtener_contenido(url: str) -> Optional[str]:
-    """Descarga y extrae texto de la página web con reintentos."""
+    """Descarga y extrae texto de la página."""
+    html = obtener_html(url)
+    return texto_pagina(BeautifulSoup(html, 'html.parser')) if html else None
+
+def texto_pagina(soup: BeautifulSoup) -> str:
+    """Texto de `<main>` con una línea por elemento."""
+    main = soup.find('main') or soup
+    return main.get_text(separator='\n', strip=True)
+
+def obtener_html(url: str) -> Optional[bytes]:
+    """Descarga la página; peticiones simultáneas a la misma URL comparten descarga."""
+    return _VUELOS_DESCARGA.hacer(canonicalizar_url(url), lambda: _descargar_html(url))
+
+def _descargar_html(url: str) -> Optional[bytes]:
+    """Descarga la página web con reintentos."""
     for intento in range(1, MAX_REINTENTOS + 1):
+        timeout = timeout_con_plazo(LATENCIA_DESCARGA.timeout(intento))
         try:
-            response = requests.get(
-                url,
-                headers=HEADERS,
-                timeout=TIMEOUT,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            main = soup.find('main') or soup
-            return main.get_text(separator='\n', strip=True)
+            return _peticion_cubierta(url, timeout)
         except requests.Timeout:
             if intento == MAX_REINTENTOS:
                 print(f"⏱️ Timeout")
@@ -142,6 +486,70 @@ def obtener_contenido(url: str) -> Optional[str]:
                 print(f"❌ Error: {e}")
     return None
 
+def _peticion(url: str, timeout: float) -> bytes:
+    """Un intento de descarga; registra latencia y resultado."""
+    inicio = time.monotonic()
+    try:
+        with requests.get(
+            url,
+            headers=HEADERS,
+            timeout=timeout,
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            html = leer_con_plazo(response)
+    except PlazoAgotado:
+        ESTADISTICAS_DESCARGA.registrar(url, time.monotonic() - inicio, 'plazo')
+        raise
+    except requests.Timeout:
+        ESTADISTICAS_DESCARGA.registrar(url, time.monotonic() - inicio, 'timeout')
+        raise
+    except requests.HTTPError as e:
+        ESTADISTICAS_DESCARGA.registrar(url, time.monotonic() - inicio, f'http_{e.response.status_code}')
+        raise
+    except requests.RequestException:
+        ESTADISTICAS_DESCARGA.registrar(url, time.monotonic() - inicio, 'conexion')
+        raise
+    segundos = time.monotonic() - inicio
+    ESTADISTICAS_DESCARGA.registrar(url, segundos, 'ok')
+    LATENCIA_DESCARGA.observar(segundos)
+    return html
+
+def _peticion_cubierta(url: str, timeout: float) -> bytes:
+    """Descarga `url`; si tarda más que el p95, lanza una copia y usa la primera respuesta.
+    
+    La petición perdedora no se puede cancelar con requests: termina en
+    segundo plano y su resultado se descarta.
+    """
+    latencia = LATENCIA_DESCARGA
+    latencia.contar_peticion()
+    umbral = latencia.umbral_cobertura()
+    if umbral is None:
+        return _peticion(url, timeout)
+    
+    ejecutor = _ejecutor_cobertura()
+    principal = ejecutor.submit(_peticion, url, timeout)
+    try:
+        return principal.result(timeout=umbral)
+    except FuturosTimeout:
+        pass
+    if not latencia.autorizar_cobertura():
+        return principal.result()
+    
+    copia = ejecutor.submit(_peticion, url, timeout)
+    pendientes = {principal, copia}
+    error = None
+    while pendientes:
+        hechas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+        for futuro in hechas:
+            if futuro.exception() is None:
+                if futuro is copia:
+                    latencia.contar_ganada()
+                return futuro.result()
+            error = error or futuro.exception()
+    raise error
+
 def buscar_patron(contenido: str, patron: re.Pattern) -> str:
     """Busca un patrón y retorna el primer match completo."""
     match = patron.search(contenido)
@@ -162,18 +570,41 @@ def extraer_fecha_correcta(contenido: str) -> str:
     
     return ''
 
+# Un patrón por libro, en el orden de LIBROS_BIBLIA (gana el primer libro que aparezca).
+# Empiezan por el nombre del libro para que el motor salte directo a él; el número
+# de los libros numerados ('1 SAMUEL') se busca después, delante de la coincidencia.
+PATRONES_LIBRO = [
+    re.compile(rf'({libro})\s*\d+(?::\d+)?(?:[-–]\d+(?::\d+)?)?', re.IGNORECASE | re.DOTALL)
+    for libro in LIBROS_BIBLIA
+]
+PATRON_LECTURA = re.compile(r'Lectura\s+b[ií]blica\s*[:\-]?\s*([A-Za-zÁÉÍÓÚáéíóúñÑ0-9\s:–\-]+)', re.IGNORECASE)
+
+def buscar_libro(contenido: str, patron: re.Pattern) -> str:
+    """Primera referencia del libro en el contenido, con su número delante si lo lleva.
+    
+    El número ('1', '2' o '3') debe estar en la misma línea, separado solo por
+    espacios o tabuladores, y no formar parte de otro número o palabra.
+    """
+    match = patron.search(contenido)
+    if not match:
+        return ''
+    inicio = match.start()
+    while inicio and contenido[inicio - 1] in ' \t':
+        inicio -= 1
+    if inicio and contenido[inicio - 1] in '123':
+        previo = contenido[inicio - 2] if inicio > 1 else ''
+        if not (previo.isalnum() or previo == '_'):
+            return contenido[inicio - 1:match.end()]
+    return match.group(0)
+
 def extraer_lectura_biblica(contenido: str) -> str:
-    """Extrae la lectura bíblica del contenido."""
-    for libro in LIBROS_BIBLIA:
-        patron = rf'({libro})\s*\d+(?::\d+)?(?:[-–]\d+(?::\d+)?)?'
-        match = re.search(patron, contenido, re.IGNORECASE | re.DOTALL)
-        if match:
-            return re.sub(r'\s+', ' ', match.group(0)).strip()
+    """Extrae la lectura bíblica del contenido (con el número de libro: '1 SAMUEL 5-7')."""
+    for patron in PATRONES_LIBRO:
+        lectura = buscar_libro(contenido, patron)
+        if lectura:
+            return re.sub(r'\s+', ' ', lectura).strip()
     
-    match2 = re.search(
-        r'Lectura\s+b[ií]blica\s*[:\-]?\s*([A-Za-zÁÉÍÓÚáéíóúñÑ0-9\s:–\-]+)',
-        contenido, re.IGNORECASE
-    )
+    match2 = PATRON_LECTURA.search(contenido)
     return re.sub(r'\s+', ' ', match2.group(1)).strip() if match2 else ''
 
 def extraer_canciones(contenido: str) -> Dict[str, str]:
@@ -253,22 +684,129 @@ def extraer_partes(contenido: str) -> Tuple[Dict[str, List[Dict]], int]:
     
     return secciones, parte_antes_cancion
 
-def extraer_datos_reunion(url: str) -> Optional[Dict]:
-    """Extrae todos los datos de la reunión desde la URL."""
-    contenido = obtener_contenido(url)
-    if not contenido:
+# Secciones del cuaderno según el color de sus encabezados en el marcado de jw.org
+CLASES_SECCION = {
+    'du-color--teal-700': 'tesoros_biblia',
+    'du-color--gold-700': 'seamos_maestros',
+    'du-color--maroon-600': 'vida_cristiana',
+}
+IDS_SECCION = {'section2': 'tesoros_biblia', 'section3': 'seamos_maestros', 'section4': 'vida_cristiana'}
+
+def _seccion_de(etiqueta) -> Optional[str]:
+    """Sección indicada por la clase de color o el id del contenedor de un encabezado."""
+    for clase in etiqueta.get('class') or ():
+        if clase in CLASES_SECCION:
+            return CLASES_SECCION[clase]
+    return IDS_SECCION.get(etiqueta.parent.get('id')) if etiqueta.parent else None
+
+def extraer_datos_dom(soup: BeautifulSoup) -> Optional[Dict]:
+    """Extrae la reunión recorriendo una sola vez los encabezados del cuaderno.
+    
+    Usa el h1 (fecha), el primer h2 (lectura) y los h3 de cada sección, que
+    se clasifican por el color o el contenedor de la sección. Retorna None si
+    el marcado no se reconoce, para usar la extracción por texto.
+    """
+    main = soup.find('main') or soup
+    fecha = lectura = ''
+    canciones: List[str] = []
+    palabras: Dict[str, str] = {}
+    numeradas: List[Tuple[str, Dict]] = []
+    sin_numero: List[Dict] = []
+    corte = None
+    seccion = None
+    
+    for etiqueta in main.find_all(['h1', 'h2', 'h3']):
+        texto = re.sub(r'\s+', ' ', etiqueta.get_text(' ', strip=True))
+        if etiqueta.name == 'h1':
+            fecha = fecha or texto
+            continue
+        if etiqueta.name == 'h2':
+            if seccion is None and not lectura:
+                lectura = extraer_lectura_biblica(texto) or texto
+            seccion = _seccion_de(etiqueta) or seccion
+            continue
+        
+        nuevas = PATRONES['cancion'].findall(texto)
+        if nuevas or PATRONES['palabras'].search(texto):
+            if len(canciones) < 2 <= len(canciones) + len(nuevas):
+                corte = max((int(n) for n, _ in numeradas), default=6)
+            canciones.extend(nuevas)
+            for match in PATRONES['palabras'].finditer(texto):
+                tipo, mins = match.groups()
+                palabras[f'palabras_{tipo}'] = f"Palabras de {tipo} ({mins} min)"
+            continue
+        
+        seccion_parte = _seccion_de(etiqueta) or seccion
+        match = PATRONES['parte_numerada'].match(texto)
+        if match and seccion_parte:
+            numeradas.append((match.group(1), {
+                'seccion': seccion_parte,
+                'titulo': match.group(2).strip(),
+                'duracion': f"{match.group(3)} min"
+            }))
+            continue
+        match = PATRONES['parte_sin_numero'].match(texto)
+        if match:
+            sin_numero.append({'titulo': match.group(1).strip(), 'duracion': f"{match.group(2)} min"})
+    
+    if not numeradas or not fecha:
         return None
     
-    partes_data, corte = extraer_partes(contenido)
+    match = PATRONES['fecha'].search(fecha)
+    if match:
+        fecha = match.group(0).strip()
     
-    datos = {
+    # Misma numeración que la extracción por texto: numeradas y luego sin número
+    secciones: Dict[str, List[Dict]] = {'tesoros_biblia': [], 'seamos_maestros': [], 'vida_cristiana': []}
+    for contador, (_, parte) in enumerate(numeradas, 1):
+        secciones[parte.pop('seccion')].append({'numero': contador, **parte})
+    for contador, parte in enumerate(sin_numero, len(numeradas) + 1):
+        secciones['vida_cristiana'].append({'numero': contador, **parte})
+    
+    return {
+        'fecha': fecha,
+        'lectura_biblica': lectura,
+        'cancion_inicial': f"Canción {canciones[0]}" if len(canciones) > 0 else '',
+        'cancion_intermedia': f"Canción {canciones[1]}" if len(canciones) > 1 else '',
+        'cancion_final': f"Canción {canciones[2]}" if len(canciones) > 2 else '',
+        'palabras_introduccion': palabras.get('palabras_introducción', ''),
+        'palabras_conclusion': palabras.get('palabras_conclusión', ''),
+        **secciones,
+        '_corte_cancion': corte or 6,
+    }
+
+def extraer_datos_texto(contenido: str) -> Dict:
+    """Extrae la reunión del texto plano de la página con expresiones regulares."""
+    partes_data, corte = extraer_partes(contenido)
+    return {
         'fecha': extraer_fecha_correcta(contenido),
         'lectura_biblica': extraer_lectura_biblica(contenido),
         **extraer_canciones(contenido),
         **extraer_palabras(contenido),
         **partes_data,
-        '_corte_cancion': corte
+        '_corte_cancion': corte,
     }
+
+# 'texto' (expresiones regulares sobre el texto plano) o 'dom' (estructura del marcado)
+MODO_EXTRACCION = 'texto'
+
+def extraer_datos_reunion(url: str) -> Optional[Dict]:
+    """Extrae todos los datos de la reunión desde la URL."""
+    if MODO_EXTRACCION == 'dom':
+        html = obtener_html(url)
+        if not html:
+            return None
+        soup = BeautifulSoup(html, 'html.parser')
+        datos = extraer_datos_dom(soup)
+        if datos is None:
+            print("  ⚠️ Marcado no reconocido, se usa la extracción por texto")
+            datos = extraer_datos_texto(texto_pagina(soup))
+    else:
+        contenido = obtener_contenido(url)
+        if not contenido:
+            return None
+        datos = extraer_datos_texto(contenido)
+    datos['_url'] = url
     
     # DEBUG: Mostrar qué se extrajo
     print(f"  📅 Fecha: {datos['fecha']}")
@@ -277,6 +815,852 @@ def extraer_datos_reunion(url: str) -> Optional[Dict]:
     
     return datos
 
+# ==================== EXTRACCIÓN POR LOTES ====================
+_CANCION_COMPLETA = re.compile(f"({PATRONES['cancion'].pattern})", PATRONES['cancion'].flags)
+
+def extraer_lote(contenidos, urls=None) -> pd.DataFrame:
+    """Extrae muchas páginas a la vez con operaciones de texto vectorizadas de pandas.
+    
+    Aplica los mismos patrones que `extraer_datos_texto`, pero como
+    `str.extract`/`str.extractall` sobre todo el lote en vez de página a página. Retorna
+    una fila por página (índice = posición en `contenidos`) con las mismas
+    columnas y valores que `extraer_datos_reunion`; las páginas vacías se
+    omiten, como las que `extraer_datos_reunion` devuelve como None.
+    """
+    textos = pd.Series(list(contenidos), dtype=object)
+    if urls is not None:
+        urls = pd.Series(list(urls), dtype=object)
+    textos = textos[textos.fillna('').astype(bool)]
+    resultado = pd.DataFrame(index=textos.index)
+    
+    # Fecha: primera coincidencia en las 20 primeras líneas, si no en todo el texto
+    lineas = textos.str.split('\n').explode()
+    lineas = lineas[lineas.groupby(level=0).cumcount() < 20]
+    patron_fecha = re.compile(f"({PATRONES['fecha'].pattern})", PATRONES['fecha'].flags)
+    en_lineas = lineas.str.extract(patron_fecha)[0].dropna().groupby(level=0).first()
+    en_texto = textos.str.extract(patron_fecha)[0]
+    resultado['fecha'] = en_lineas.reindex(textos.index).fillna(en_texto).fillna('').str.strip()
+    
+    # Lectura: el primer libro de LIBROS_BIBLIA que aparezca; si no, "Lectura bíblica: ..."
+    # Cada patrón de libro se aplica solo a las páginas sin lectura que contienen el nombre
+    # (búsqueda literal sobre el texto en mayúsculas), en lugar de 56 pasadas de regex.
+    mayusculas = textos.str.upper()
+    lectura = pd.Series(index=textos.index, dtype=object)
+    for libro, patron in zip(LIBROS_BIBLIA, PATRONES_LIBRO):
+        sin_lectura = mayusculas[lectura.isna()]
+        paginas = sin_lectura[sin_lectura.str.contains(libro, regex=False)].index
+        if not paginas.empty:
+            encontradas = textos[paginas].map(lambda texto: buscar_libro(texto, patron) or None)
+            lectura = lectura.fillna(encontradas)
+    restantes = textos[lectura.isna()]
+    if not restantes.empty:
+        lectura = lectura.fillna(restantes.str.extract(PATRON_LECTURA)[0])
+    resultado['lectura_biblica'] = lectura.fillna('').str.replace(r'\s+', ' ', regex=True).str.strip()
+    
+    # Canciones, y la posición de la segunda (corte de secciones) partiendo el texto en ella
+    canciones = textos.str.extractall(PATRONES['cancion']).reset_index(level=1)
+    for orden, clave in enumerate(('cancion_inicial', 'cancion_intermedia', 'cancion_final')):
+        numeros = canciones.loc[canciones['match'] == orden, 0]
+        resultado[clave] = ('Canción ' + numeros).reindex(textos.index).fillna('')
+    trozos = textos.str.split(_CANCION_COMPLETA, n=2, regex=True)
+    trozos = trozos[trozos.str.len() > 5]  # [antes, canción 1, número, entre ambas, canción 2, ...]
+    inicio_segunda = sum(trozos.str[k].str.len() for k in (0, 1, 3))
+    
+    # Palabras de introducción y conclusión (la última de cada tipo)
+    palabras = textos.str.extractall(PATRONES['palabras'])
+    for tipo, clave in (('introducción', 'palabras_introduccion'), ('conclusión', 'palabras_conclusion')):
+        del_tipo = palabras[palabras[0] == tipo].groupby(level=0)[1].last()
+        resultado[clave] = ('Palabras de ' + tipo + ' (' + del_tipo + ' min)').reindex(textos.index).fillna('')
+    
+    # Partes numeradas y sin número, clasificadas con el corte de la canción intermedia
+    # `extractall` no informa posiciones; `finditer` da el inicio de cada parte en la misma pasada
+    numeradas = pd.DataFrame(
+        [(pagina, match.start(), int(match.group(1)), match.group(2), match.group(3))
+         for pagina, texto in textos.items() for match in PATRONES['parte_numerada'].finditer(texto)],
+        columns=['pagina', 'inicio', 'num', 3, 4]
+    ).set_index('pagina')
+    antes = numeradas[numeradas['inicio'] < inicio_segunda.reindex(numeradas.index)]
+    corte = antes.groupby(level=0)['num'].max().reindex(textos.index).fillna(6).astype(int)
+    
+    numeradas['seccion'] = 'vida_cristiana'
+    numeradas.loc[numeradas['num'] <= corte.reindex(numeradas.index), 'seccion'] = 'seamos_maestros'
+    numeradas.loc[numeradas['num'] <= 3, 'seccion'] = 'tesoros_biblia'
+    numeradas = pd.DataFrame({'seccion': numeradas['seccion'], 'titulo': numeradas[3].str.strip(),
+                              'duracion': numeradas[4] + ' min'})
+    
+    sin_numero = textos.str.extractall(PATRONES['parte_sin_numero']).reset_index(level=1, drop=True)
+    sin_numero = pd.DataFrame({'seccion': 'vida_cristiana', 'titulo': sin_numero[0].str.strip(),
+                               'duracion': sin_numero[1] + ' min'}, index=sin_numero.index)
+    
+    partes = pd.concat([numeradas, sin_numero]).sort_index(kind='stable')
+    partes['numero'] = partes.groupby(level=0).cumcount() + 1
+    
+    # Las listas de partes por sección se arman en una sola pasada sobre la tabla larga
+    secciones = {seccion: {pagina: [] for pagina in textos.index}
+                 for seccion in ('tesoros_biblia', 'seamos_maestros', 'vida_cristiana')}
+    for pagina, seccion, numero, titulo, duracion in zip(
+            partes.index, partes['seccion'], partes['numero'].tolist(), partes['titulo'], partes['duracion']):
+        secciones[seccion][pagina].append({'numero': numero, 'titulo': titulo, 'duracion': duracion})
+    for seccion, listas in secciones.items():
+        resultado[seccion] = list(listas.values())
+    
+    resultado['_corte_cancion'] = corte
+    if urls is not None:
+        resultado['_url'] = urls.reindex(textos.index)
+    return resultado
+
+def registros_lote(resultado: pd.DataFrame) -> List[Dict]:
+    """Convierte el resultado de `extraer_lote` en los diccionarios de `extraer_datos_reunion`."""
+    return resultado.to_dict('records')
+
+# ==================== PERFIL DE MEMORIA ====================
+class PerfilMemoria:
+    """Mide con tracemalloc el pico y la memoria retenida por etapa y por semana.
+    
+    Las etapas pueden anidarse: el pico de una etapa incluye el de sus hijas.
+    Inactivo no tiene costo alguno.
+    """
+    
+    def __init__(self, activo: bool = False, top: int = 10):
+        self.activo = activo
+        self.top = top
+        self.etapas: List[Dict] = []
+        self.semanas: List[Dict] = []
+        self.sitios: Dict[str, List[str]] = {}
+        self._pila: List[Dict] = []
+        if activo:
+            tracemalloc.start()
+    
+    @contextlib.contextmanager
+    def etapa(self, nombre: str, semana: bool = False):
+        """Registra pico y memoria retenida del bloque `with`."""
+        if not self.activo:
+            yield
+            return
+        
+        actual, pico = tracemalloc.get_traced_memory()
+        if self._pila:
+            self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+        marco = {'base': actual, 'pico': actual}
+        self._pila.append(marco)
+        inicio = time.monotonic()
+        
+        try:
+            yield
+        finally:
+            self._pila.pop()
+            actual, pico = tracemalloc.get_traced_memory()
+            pico = max(pico, marco['pico'])
+            if self._pila:
+                self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+            
+            registro = {
+                'nombre': nombre,
+                'pico': pico - marco['base'],
+                'retenida': actual - marco['base'],
+                'segundos': time.monotonic() - inicio
+            }
+            if semana:
+                self.semanas.append(registro)
+            else:
+                self.etapas.append(registro)
+                # Principales sitios de asignación vivos al terminar la etapa
+                estadisticas = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+                )).statistics('lineno')
+                self.sitios[nombre] = [str(e) for e in estadisticas[:self.top]]
+    
+    def reporte(self) -> str:
+        """Texto del reporte de memoria."""
+        mb = lambda b: f"{b / 1024 / 1024:8.2f} MB"
+        lineas = ["PERFIL DE MEMORIA", "=" * 70, "", "Por etapa (pico / retenida / tiempo):"]
+        for r in self.etapas:
+            lineas.append(f"  {r['nombre']:<20} {mb(r['pico'])} {mb(r['retenida'])} {r['segundos']:8.2f} s")
+        
+        if self.semanas:
+            lineas += ["", "Por semana (pico / retenida / tiempo):"]
+            for r in self.semanas:
+                lineas.append(f"  {r['nombre'][:30]:<30} {mb(r['pico'])} {mb(r['retenida'])} {r['segundos']:8.2f} s")
+        
+        for nombre, sitios in self.sitios.items():
+            lineas += ["", f"Principales asignaciones vivas al final de '{nombre}':"]
+            lineas += [f"  {sitio}" for sitio in sitios]
+        return "\n".join(lineas) + "\n"
+    
+    def guardar_reporte(self, ruta: str) -> None:
+        """Escribe el reporte y detiene tracemalloc."""
+        if not self.activo:
+            return
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(self.reporte())
+        tracemalloc.stop()
+        self.activo = False
+        print(f"🧠 Perfil de memoria guardado en {ruta}\n")
+
+# ==================== DIARIO DE PUNTOS DE CONTROL ====================
+class DiarioCheckpoint:
+    """Diario de solo anexado con una línea JSON por semana completada.
+    
+    Cada registro se anexa completo sobre un descriptor O_APPEND: si write()
+    acepta solo parte se escribe el resto, y si falla a medias se recorta lo
+    escrito, de modo que un corte solo puede dejar truncada la última línea.
+    """
+    
+    def __init__(self, ruta: str = ARCHIVO_CHECKPOINT, reanudar: bool = False):
+        self.ruta = ruta
+        self.completadas: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        
+        if reanudar:
+            self.completadas = self.cargar()
+            self._descartar_linea_incompleta()
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        else:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+        self._fd = os.open(ruta, flags, 0o644)
+    
+    def cargar(self) -> Dict[str, Dict]:
+        """Reproduce el diario y retorna los datos por URL."""
+        completadas = {}
+        if not os.path.exists(self.ruta):
+            return completadas
+        
+        with open(self.ruta, encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue  # Línea truncada por una interrupción
+                completadas[registro['url']] = registro['datos']
+        return completadas
+    
+    def _descartar_linea_incompleta(self) -> None:
+        """Recorta una última línea sin salto para no corromper el siguiente registro."""
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, 'rb+') as f:
+            contenido = f.read()
+            if contenido and not contenido.endswith(b'\n'):
+                f.truncate(contenido.rfind(b'\n') + 1)
+    
+    def registrar(self, url: str, datos: Dict) -> None:
+        """Anexa una semana completada al diario."""
+        linea = (json.dumps({'url': url, 'datos': datos}, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            inicio = os.lseek(self._fd, 0, os.SEEK_END)
+            try:
+                escritos = 0
+                while escritos < len(linea):
+                    n = os.write(self._fd, linea[escritos:])
+                    if n <= 0:
+                        raise OSError(f"write() no escribió nada en {self.ruta}")
+                    escritos += n
+                os.fsync(self._fd)
+            except OSError:
+                # Sin la línea parcial, el próximo registro no se pega a ella
+                os.ftruncate(self._fd, inicio)
+                raise
+    
+    def cerrar(self) -> None:
+        os.close(self._fd)
+
+def datos_pendiente(semana: Dict[str, str], motivo: str) -> Dict:
+    """Fila de marcador para una semana que no llegó a extraerse."""
+    fecha = PATRONES['fecha'].search(semana['titulo'])
+    return {
+        'fecha': fecha.group(0) if fecha else semana['titulo'],
+        'lectura_biblica': f"⚠️ No extraída: {motivo}",
+        'cancion_inicial': '', 'cancion_intermedia': '', 'cancion_final': '',
+        'palabras_introduccion': '', 'palabras_conclusion': '',
+        'tesoros_biblia': [], 'seamos_maestros': [], 'vida_cristiana': [],
+        '_corte_cancion': 0,
+        '_url': semana['url'],
+        '_pendiente': motivo
+    }
+
+def procesar_semanas(enlaces: List[Dict[str, str]], diario: Optional[DiarioCheckpoint] = None,
+                     hilos: int = 1, perfil: Optional[PerfilMemoria] = None,
+                     escritor: Optional['EscritorFondo'] = None) -> Tuple[List[Dict], List[str]]:
+    """Extrae todas las semanas, registrando cada una en el diario si existe.
+    
+    Con `hilos` > 1 las semanas se descargan en paralelo; el resultado
+    conserva siempre el orden de `enlaces`. El perfil de memoria por semana
+    solo se mide en modo secuencial. Si vence el plazo global, las semanas
+    sin extraer se devuelven como marcadores con '_pendiente'. Con `escritor`,
+    cada semana se entrega para exportarse en cuanto termina.
+    """
+    perfil = perfil or PerfilMemoria()
+    resultados: Dict[int, Dict] = {}
+    fallos: Dict[int, str] = {}
+    pendientes = []
+    total = len(enlaces)
+    
+    for i, semana in enumerate(enlaces, 1):
+        if diario and semana['url'] in diario.completadas:
+            resultados[i] = diario.completadas[semana['url']]
+            if escritor:
+                escritor.enviar(i, resultados[i])
+        else:
+            pendientes.append((i, semana))
+    reanudadas = len(resultados)
+    
+    def completar(i: int, semana: Dict[str, str], datos: Optional[Dict]) -> None:
+        if datos:
+            resultados[i] = datos
+            if diario:
+                diario.registrar(semana['url'], datos)
+        else:
+            fallar(i, semana['titulo'])
+            return
+        if escritor:
+            escritor.enviar(i, datos)
+    
+    def fallar(i: int, error: str) -> None:
+        fallos[i] = error
+        if escritor:
+            escritor.enviar(i, None)
+    
+    if hilos <= 1:
+        for i, semana in pendientes:
+            if PLAZO_EJECUCION.vencido():
+                break
+            try:
+                print(f"⏳ [{i}/{total}] {semana['titulo']}...", end=" ")
+                with perfil.etapa(semana['titulo'], semana=True):
+                    datos = extraer_datos_reunion(semana['url'])
+                print("✅" if datos else "❌")
+                completar(i, semana, datos)
+            except PlazoAgotado:
+                print("⏰")
+                break
+            except Exception as e:
+                print(f"❌ ({e})")
+                fallar(i, f"{semana['titulo']}: {e}")
+    else:
+        executor = ThreadPoolExecutor(max_workers=hilos)
+        futuros = {
+            executor.submit(extraer_datos_reunion, semana['url']): (i, semana)
+            for i, semana in pendientes
+        }
+        try:
+            for futuro in as_completed(futuros, timeout=PLAZO_EJECUCION.restante()):
+                i, semana = futuros[futuro]
+                try:
+                    datos = futuro.result()
+                    print(f"⏳ [{i}/{total}] {semana['titulo']}... {'✅' if datos else '❌'}")
+                    completar(i, semana, datos)
+                except PlazoAgotado:
+                    pass
+                except Exception as e:
+                    print(f"⏳ [{i}/{total}] {semana['titulo']}... ❌ ({e})")
+                    fallar(i, f"{semana['titulo']}: {e}")
+        except FuturosTimeout:
+            pass
+        finally:
+            # Cancela lo que no empezó; lo que está en curso termina con el plazo
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    # Semanas que no llegaron a extraerse por el plazo
+    sin_extraer = [(i, semana) for i, semana in pendientes if i not in resultados and i not in fallos]
+    for i, semana in sin_extraer:
+        resultados[i] = datos_pendiente(semana, "plazo agotado")
+        if escritor:
+            escritor.enviar(i, resultados[i])
+    if sin_extraer:
+        print(f"\n⏰ Plazo agotado: {len(sin_extraer)} semanas sin extraer")
+        for _, semana in sin_extraer:
+            print(f"   - {semana['titulo']}")
+    
+    if reanudadas:
+        print(f"\n♻️ {reanudadas} semanas recuperadas del checkpoint")
+    
+    datos_todas = [resultados[i] for i in sorted(resultados)]
+    errores = [fallos[i] for i in sorted(fallos)]
+    return datos_todas, errores
+
+# ==================== COLA DE TRABAJO DISTRIBUIDA ====================
+class ColaTrabajo:
+    """Cola duradera de semanas en SQLite, compartida por coordinador y trabajadores.
+    
+    Cada trabajador toma una semana con un lease: queda 'en_curso' hasta
+    `vence`; si el trabajador muere sin completarla, al vencer el lease otro
+    trabajador la vuelve a tomar. Cada toma es una transacción IMMEDIATE,
+    así que dos procesos nunca reciben la misma semana con un lease vigente.
+    Sobre un sistema de archivos compartido, SQLite depende de que los
+    bloqueos de archivo funcionen en ese sistema (NFS con `lockd`, SMB), y
+    los leases usan la hora de cada máquina, que debe estar sincronizada.
+    """
+    
+    def __init__(self, ruta: str, visibilidad: float = VISIBILIDAD_LEASE,
+                 max_intentos: int = MAX_INTENTOS_COLA):
+        self.ruta = ruta
+        self.visibilidad = visibilidad
+        self.max_intentos = max_intentos
+        self.conexion = sqlite3.connect(ruta, timeout=60, isolation_level=None)
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS semanas (
+                url TEXT PRIMARY KEY,
+                posicion INTEGER NOT NULL,
+                titulo TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'pendiente',
+                intentos INTEGER NOT NULL DEFAULT 0,
+                trabajador TEXT,
+                vence REAL,
+                datos TEXT,
+                error TEXT
+            )""")
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS semanas_estado ON semanas (estado, posicion)")
+    
+    def encolar(self, enlaces: List[Dict[str, str]]) -> int:
+        """Agrega las semanas nuevas y reactiva las fallidas; conserva las hechas."""
+        with self._transaccion():
+            antes = self.conexion.total_changes
+            self.conexion.executemany("""
+                INSERT INTO semanas (url, posicion, titulo) VALUES (?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    posicion = excluded.posicion, estado = 'pendiente', intentos = 0, error = NULL
+                WHERE estado = 'fallida'""",
+                [(semana['url'], i, semana['titulo']) for i, semana in enumerate(enlaces, 1)])
+            return self.conexion.total_changes - antes
+    
+    def tomar(self, trabajador: str) -> Optional[Dict]:
+        """Toma la siguiente semana disponible (pendiente o con lease vencido)."""
+        with self._transaccion():
+            ahora = time.time()  # Tras obtener el bloqueo: la espera no debe acortar la lease
+            while True:
+                fila = self.conexion.execute("""
+                    SELECT url, posicion, titulo, intentos FROM semanas
+                    WHERE estado = 'pendiente' OR (estado = 'en_curso' AND vence < ?)
+                    ORDER BY posicion LIMIT 1""", (ahora,)).fetchone()
+                if fila is None:
+                    return None
+                url, posicion, titulo, intentos = fila
+                if intentos < self.max_intentos:
+                    break
+                # Lease vencido tras el último intento: el trabajador murió con ella
+                self.conexion.execute(
+                    "UPDATE semanas SET estado = 'fallida', error = 'lease vencido' WHERE url = ?", (url,))
+            self.conexion.execute("""
+                UPDATE semanas SET estado = 'en_curso', trabajador = ?, vence = ?, intentos = intentos + 1
+                WHERE url = ?""", (trabajador, ahora + self.visibilidad, url))
+        return {'url': url, 'posicion': posicion, 'titulo': titulo, 'intento': intentos + 1}
+    
+    def completar(self, url: str, datos: Dict) -> None:
+        """Guarda el resultado; si otro trabajador ya la completó, se conserva el primero."""
+        with self._transaccion():
+            self.conexion.execute("""
+                UPDATE semanas SET estado = 'hecha', datos = ?, vence = NULL, error = NULL
+                WHERE url = ? AND estado != 'hecha'""", (json.dumps(datos, ensure_ascii=False), url))
+    
+    def fallar(self, url: str, trabajador: str, error: str) -> None:
+        """Devuelve la semana a la cola, o la marca fallida si agotó sus intentos.
+        
+        Solo si la lease sigue siendo de este trabajador: si venció y otro la
+        tomó, el fallo tardío no debe quitarle la semana.
+        """
+        with self._transaccion():
+            self.conexion.execute("""
+                UPDATE semanas SET
+                    estado = CASE WHEN intentos >= ? THEN 'fallida' ELSE 'pendiente' END,
+                    vence = NULL, error = ?
+                WHERE url = ? AND estado = 'en_curso' AND trabajador = ?""",
+                (self.max_intentos, error, url, trabajador))
+    
+    def resumen(self) -> Dict[str, int]:
+        """Número de semanas por estado."""
+        conteo = {'pendiente': 0, 'en_curso': 0, 'hecha': 0, 'fallida': 0}
+        for estado, n in self.conexion.execute("SELECT estado, COUNT(*) FROM semanas GROUP BY estado"):
+            conteo[estado] = n
+        return conteo
+    
+    def resultados(self) -> Dict[str, Tuple[str, Optional[Dict], Optional[str]]]:
+        """Estado, datos y error de cada semana, por URL."""
+        return {
+            url: (estado, json.loads(datos) if datos else None, error)
+            for url, estado, datos, error in self.conexion.execute(
+                "SELECT url, estado, datos, error FROM semanas")
+        }
+    
+    def cerrar(self) -> None:
+        self.conexion.close()
+    
+    @contextlib.contextmanager
+    def _transaccion(self):
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conexion.execute("ROLLBACK")
+            raise
+        self.conexion.execute("COMMIT")
+
+def trabajar(ruta_cola: str, nombre: Optional[str] = None, visibilidad: float = VISIBILIDAD_LEASE,
+             espera: float = 1.0) -> int:
+    """Bucle de un trabajador: toma semanas de la cola hasta que no quede ninguna.
+    
+    Mientras haya semanas en curso de otros trabajadores se sigue esperando,
+    por si su lease vence y hay que reintentarlas. Retorna las semanas completadas.
+    """
+    nombre = nombre or f"{socket.gethostname()}-{os.getpid()}"
+    cola = ColaTrabajo(ruta_cola, visibilidad)
+    completadas = 0
+    try:
+        while True:
+            item = cola.tomar(nombre)
+            if item is None:
+                resumen = cola.resumen()
+                if not resumen['pendiente'] and not resumen['en_curso']:
+                    break
+                time.sleep(espera)
+                continue
+            
+            print(f"⏳ [{nombre}] {item['titulo']} (intento {item['intento']})...")
+            try:
+                datos = extraer_datos_reunion(item['url'])
+            except Exception as e:
+                cola.fallar(item['url'], nombre, str(e))
+                continue
+            if datos:
+                cola.completar(item['url'], datos)
+                completadas += 1
+            else:
+                cola.fallar(item['url'], nombre, 'sin contenido')
+    finally:
+        cola.cerrar()
+    print(f"✅ [{nombre}] {completadas} semanas completadas")
+    return completadas
+
+def _proceso_trabajador(ruta_cola: str, modo: str, visibilidad: float) -> None:
+    global MODO_EXTRACCION
+    MODO_EXTRACCION = modo
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        trabajar(ruta_cola, visibilidad=visibilidad)
+
+def coordinar_semanas(enlaces: List[Dict[str, str]], ruta_cola: str, trabajadores: int = 0,
+                      visibilidad: float = VISIBILIDAD_LEASE, espera: float = 0.5) -> Tuple[List[Dict], List[str]]:
+    """Encola las semanas, lanza `trabajadores` procesos locales y espera a que se vacíe la cola.
+    
+    Otros trabajadores (`--trabajador COLA`, en esta u otra máquina con el
+    mismo archivo) pueden sumarse en cualquier momento. Retorna lo mismo que
+    `procesar_semanas`; si vence el plazo, lo pendiente queda como marcador.
+    """
+    cola = ColaTrabajo(ruta_cola, visibilidad)
+    nuevas = cola.encolar(enlaces)
+    print(f"📬 {nuevas} semanas encoladas en {ruta_cola}\n")
+    
+    procesos = [
+        multiprocessing.Process(target=_proceso_trabajador, args=(ruta_cola, MODO_EXTRACCION, visibilidad), daemon=True)
+        for _ in range(trabajadores)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    
+    try:
+        anterior = None
+        while not PLAZO_EJECUCION.vencido():
+            resumen = cola.resumen()
+            if resumen != anterior:
+                print(f"   ✅ {resumen['hecha']}  ⏳ {resumen['en_curso']}  📋 {resumen['pendiente']}  ❌ {resumen['fallida']}")
+                anterior = resumen
+            if not resumen['pendiente'] and not resumen['en_curso']:
+                break
+            time.sleep(espera)
+        resultados = cola.resultados()
+    finally:
+        for proceso in procesos:
+            if PLAZO_EJECUCION.vencido():
+                proceso.terminate()
+            proceso.join()
+        cola.cerrar()
+    
+    datos_todas, errores, sin_extraer = [], [], []
+    for semana in enlaces:
+        estado, datos, error = resultados.get(semana['url'], ('pendiente', None, None))
+        if estado == 'hecha':
+            datos_todas.append(datos)
+        elif estado == 'fallida':
+            errores.append(f"{semana['titulo']}: {error}")
+        else:
+            datos_todas.append(datos_pendiente(semana, "plazo agotado"))
+            sin_extraer.append(semana)
+    if sin_extraer:
+        print(f"\n⏰ Plazo agotado: {len(sin_extraer)} semanas sin extraer")
+    return datos_todas, errores
+
+# ==================== CANCIONERO ====================
+def parsear_cancionero_html(html: bytes) -> Dict[int, str]:
+    """Extrae número y título de cada canción desde la página índice del cancionero."""
+    soup = BeautifulSoup(html, 'html.parser')
+    titulos = {}
+    for link in soup.find_all('a'):
+        match = re.match(r'^(\d{1,3})\.?\s+(.+)$', link.get_text(' ', strip=True))
+        if match:
+            titulos.setdefault(int(match.group(1)), match.group(2).strip())
+    return titulos
+
+def parsear_cancionero_archivo(ruta: str) -> Dict[int, str]:
+    """Lee un cancionero local en JSON ({"1": "Título"}) o texto ("1. Título" por línea)."""
+    with open(ruta, encoding='utf-8') as f:
+        contenido = f.read()
+    
+    if ruta.endswith('.json'):
+        datos = json.loads(contenido)
+        datos = datos.get('titulos', datos)  # Acepta también el formato de la caché
+        return {int(num): titulo for num, titulo in datos.items()}
+    
+    titulos = {}
+    for linea in contenido.splitlines():
+        match = re.match(r'^\s*(\d{1,3})[.\t,;]?\s*(.+)$', linea)
+        if match:
+            titulos[int(match.group(1))] = match.group(2).strip()
+    return titulos
+
+def _tabla_canciones(titulos: Dict[int, str]) -> List[str]:
+    """Convierte {número: título} en una lista indexada por número."""
+    tabla = [''] * (max(titulos, default=0) + 1)
+    for num, titulo in titulos.items():
+        tabla[num] = titulo
+    return tabla
+
+def cargar_cancionero(ruta_local: Optional[str] = None, ruta_cache: str = ARCHIVO_CANCIONERO,
+                      url: str = URL_CANCIONERO, ttl: int = TTL_CANCIONERO) -> List[str]:
+    """Retorna la tabla número→título, desde archivo local, caché o una única descarga."""
+    if ruta_local:
+        titulos = parsear_cancionero_archivo(ruta_local)
+        print(f"🎵 Cancionero cargado de {ruta_local}: {len(titulos)} canciones\n")
+        return _tabla_canciones(titulos)
+    
+    cache = None
+    if os.path.exists(ruta_cache):
+        try:
+            with open(ruta_cache, encoding='utf-8') as f:
+                cache = json.load(f)
+            cache['titulos'] = {int(n): t for n, t in cache['titulos'].items()}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            print(f"⚠️ Caché del cancionero dañada ({ruta_cache}); se descarga de nuevo\n")
+            cache = None  # Escritura interrumpida o editada a mano: como si no existiera
+        if cache and time.time() - cache.get('obtenido', 0) < ttl:
+            return _tabla_canciones(cache['titulos'])
+    
+    try:
+        print("🎵 Descargando índice del cancionero...\n")
+        # Corre dentro de la ejecución: respeta el plazo global (--plazo) como las semanas
+        response = requests.get(url, headers=HEADERS, timeout=timeout_con_plazo(), stream=True)
+        response.raise_for_status()
+        titulos = parsear_cancionero_html(leer_con_plazo(response))
+        if not titulos:
+            raise ValueError("la página no contiene canciones")
+        
+        tmp = f"{ruta_cache}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'obtenido': time.time(), 'url': url, 'titulos': titulos}, f, ensure_ascii=False)
+        os.replace(tmp, ruta_cache)
+        print(f"✅ {len(titulos)} canciones guardadas en {ruta_cache}\n")
+        return _tabla_canciones(titulos)
+        
+    except Exception as e:
+        print(f"❌ Error al obtener el cancionero: {e}")
+        if cache:
+            print("   Usando la caché anterior")
+            return _tabla_canciones(cache['titulos'])
+        return []
+
+def enriquecer_canciones(datos: Dict, titulos: List[str]) -> Dict:
+    """Agrega el título de las 3 canciones a los datos de la reunión."""
+    for clave in ('cancion_inicial', 'cancion_intermedia', 'cancion_final'):
+        match = PATRONES['cancion'].match(datos.get(clave, ''))
+        num = int(match.group(1)) if match else 0
+        datos[f'titulo_{clave}'] = titulos[num] if 0 < num < len(titulos) else ''
+    return datos
+
+def _texto_cancion(datos: Dict, clave: str) -> str:
+    """Texto de una canción con su título si está disponible."""
+    titulo = datos.get(f'titulo_{clave}')
+    return f"{datos[clave]} - {titulo}" if titulo else datos[clave]
+
+# ==================== FILAS DE EXPORTACIÓN ====================
+def construir_encabezados() -> List[str]:
+    """Retorna los encabezados de la tabla de reuniones (9 pares de partes)."""
+    encabezados = [
+        'Semana', 'Fecha', 'Lectura Bíblica',
+        'Canción Inicial', 'Palabras Introducción',
+    ]
+    
+    # Agregar 9 pares de columnas para partes
+    for i in range(1, 10):
+        encabezados.extend([f'Parte {i}', f'Duración {i}'])
+    
+    encabezados.extend([
+        'Canción Intermedia', 'Palabras Conclusión', 'Canción Final', 'Inicio Semana'
+    ])
+    return encabezados
+
+def construir_fila(i: int, datos: Dict) -> List:
+    """Convierte los datos de una reunión en una fila de la tabla."""
+    partes = [
+        *datos['tesoros_biblia'],
+        *datos['seamos_maestros'],
+        *datos['vida_cristiana']
+    ]
+    partes.sort(key=lambda x: x['numero'])
+    
+    fila = [
+        i,
+        datos['fecha'],
+        datos['lectura_biblica'],
+        _texto_cancion(datos, 'cancion_inicial'),
+        datos['palabras_introduccion'],
+    ]
+    
+    # Agregar partes (máximo 9)
+    for j in range(9):
+        if j < len(partes):
+            fila.append(partes[j]['titulo'])
+            fila.append(partes[j]['duracion'])
+        else:
+            fila.append('')
+            fila.append('')
+    
+    inicio = fecha_inicio_semana(datos)
+    fila.extend([
+        _texto_cancion(datos, 'cancion_intermedia'),
+        datos['palabras_conclusion'],
+        _texto_cancion(datos, 'cancion_final'),
+        inicio.isoformat() if inicio else ''
+    ])
+    return fila
+
+# ==================== CLIENTE DE SHEETS CON CUOTA ====================
+class LimitadorCuota:
+    """Limita las llamadas a `por_minuto` en cualquier ventana de 60 segundos.
+    
+    Guarda el instante de las llamadas del último minuto: una cubeta de fichas
+    llena dejaría pasar hasta el doble de la cuota en el primer minuto.
+    """
+    
+    def __init__(self, por_minuto: int, reloj=time.monotonic, dormir=time.sleep,
+                 margen: float = SHEETS_MARGEN_VENTANA):
+        self.por_minuto = por_minuto
+        self.ventana = 60 + margen
+        self.reloj = reloj
+        self.dormir = dormir
+        self.llamadas: deque = deque()
+        self._lock = threading.Lock()
+    
+    def adquirir(self) -> float:
+        """Espera hasta que haya cuota libre y retorna los segundos esperados."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                ahora = self.reloj()
+                while self.llamadas and self.llamadas[0] + self.ventana <= ahora:
+                    self.llamadas.popleft()
+                if len(self.llamadas) < self.por_minuto:
+                    self.llamadas.append(ahora)
+                    return esperado
+                # Un mínimo de 1 ms evita girar sobre diferencias de redondeo
+                espera = max(self.llamadas[0] + self.ventana - ahora, 0.001)
+            self.dormir(espera)
+            esperado += espera
+
+def _es_limite_cuota(error: Exception) -> bool:
+    """Indica si el error de la API corresponde a un 429 (cuota excedida)."""
+    respuesta = getattr(error, 'response', None)
+    codigo = getattr(respuesta, 'status_code', None) or getattr(error, 'code', None)
+    return codigo == 429
+
+class ClienteSheets:
+    """Envoltorio de gspread que limita, reintenta y mide cada llamada a la API.
+    
+    Cualquier objeto con la interfaz de gspread sirve como `gc`, así que puede
+    probarse con un cliente falso local, un reloj simulado y un `azar` con
+    semilla para que la variación de las esperas sea reproducible.
+    """
+    
+    def __init__(self, gc, por_minuto: int = SHEETS_CUOTA_POR_MINUTO,
+                 max_reintentos: int = SHEETS_MAX_REINTENTOS,
+                 reloj=time.monotonic, dormir=time.sleep, azar: Optional[random.Random] = None):
+        self.gc = gc
+        self.limitador = LimitadorCuota(por_minuto, reloj=reloj, dormir=dormir)
+        self.max_reintentos = max_reintentos
+        self.reloj = reloj
+        self.dormir = dormir
+        self.azar = azar if azar is not None else random.Random()
+        self.estadisticas: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    def _registrar(self, operacion: str, segundos: float, reintento: bool = False) -> None:
+        with self._lock:
+            est = self.estadisticas.setdefault(
+                operacion, {'llamadas': 0, 'reintentos': 0, 'segundos': 0.0, 'max_segundos': 0.0}
+            )
+            est['llamadas'] += 1
+            est['reintentos'] += int(reintento)
+            est['segundos'] += segundos
+            est['max_segundos'] = max(est['max_segundos'], segundos)
+    
+    def llamar(self, operacion: str, funcion, *args, **kwargs):
+        """Ejecuta una llamada respetando la cuota y reintentando los 429."""
+        for intento in range(self.max_reintentos + 1):
+            self.limitador.adquirir()
+            inicio = self.reloj()
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception as e:
+                self._registrar(operacion, self.reloj() - inicio, reintento=True)
+                if not _es_limite_cuota(e) or intento == self.max_reintentos:
+                    raise
+                # Espera exponencial con variación aleatoria
+                self.dormir(min(2 ** intento, 64) + self.azar.random())
+                continue
+            self._registrar(operacion, self.reloj() - inicio)
+            return resultado
+    
+    def total_llamadas(self) -> int:
+        """Número total de llamadas realizadas a la API (incluye reintentos)."""
+        return int(sum(est['llamadas'] for est in self.estadisticas.values()))
+    
+    def mostrar_resumen(self) -> None:
+        """Muestra llamadas y latencia por operación."""
+        if not self.estadisticas:
+            return
+        print("📈 Llamadas a la API de Sheets:")
+        for operacion, est in self.estadisticas.items():
+            media = est['segundos'] / est['llamadas'] * 1000
+            print(f"  {operacion}: {est['llamadas']} llamadas, {est['reintentos']} fallidas, "
+                  f"media {media:.0f} ms, máx {est['max_segundos'] * 1000:.0f} ms")
+        print()
+
+def asegurar_cliente(gc) -> ClienteSheets:
+    """Envuelve un cliente gspread en ClienteSheets si aún no lo está."""
+    return gc if isinstance(gc, ClienteSheets) else ClienteSheets(gc)
+
+def solicitudes_plantilla(sheet_id: int = 0) -> List[Dict]:
+    """Solicitudes de batchUpdate que preparan título, encabezados, formato y fila fija."""
+    encabezados = construir_encabezados()
+    return [
+        {'updateSheetProperties': {
+            'properties': {'sheetId': sheet_id, 'title': 'Reuniones', 'gridProperties': {'frozenRowCount': 1}},
+            'fields': 'title,gridProperties.frozenRowCount'
+        }},
+        {'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+            'rows': [{'values': [{'userEnteredValue': {'stringValue': e}} for e in encabezados]}],
+            'fields': 'userEnteredValue'
+        }},
+        {'repeatCell': {
+            'range': {'sheetId': sheet_id, 'startRowIndex': 0, 'endRowIndex': 1},
+            'cell': {'userEnteredFormat': {
+                'backgroundColor': {'red': 0.2, 'green': 0.2, 'blue': 0.6},
+                'textFormat': {'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}, 'bold': True}
+            }},
+            'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+        }},
+    ]
+
 # ==================== FUNCIONES PARA GOOGLE SHEETS ====================
 def conectar_google_sheets():
     """Conecta con Google Sheets y retorna el cliente."""
@@ -290,7 +1674,7 @@ def conectar_google_sheets():
         creds, _ = default()
         gc = gspread.authorize(creds)
         print("✅ Autenticación exitosa\n")
-        return gc
+        return ClienteSheets(gc)
     except Exception as e:
         print(f"❌ Error de autenticación: {e}")
         return None
@@ -300,38 +1684,16 @@ def crear_plantilla_sheets(gc, titulo_libro: str) -> Optional[str]:
     try:
         print(f"📝 Creando plantilla: '{titulo_libro}'...\n")
         
-        # Crear libro
-        sh = gc.create(titulo_libro)
-        worksheet = sh.sheet1
-        worksheet.update_title("Reuniones")
-        
-        # Encabezados expandidos para 9 partes
-        encabezados = [
-            'Semana', 'Fecha', 'Lectura Bíblica',
-            'Canción Inicial', 'Palabras Introducción',
-        ]
-        
-        # Agregar 9 pares de columnas para partes
-        for i in range(1, 10):
-            encabezados.extend([f'Parte {i}', f'Duración {i}'])
-        
-        encabezados.extend([
-            'Canción Intermedia', 'Palabras Conclusión', 'Canción Final'
-        ])
-        
-        worksheet.append_row(encabezados)
+        cliente = asegurar_cliente(gc)
         
-        # Formatear encabezado
-        worksheet.format('1:1', {
-            'backgroundColor': {'red': 0.2, 'green': 0.2, 'blue': 0.6},
-            'textFormat': {'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}, 'bold': True}
-        })
+        # Crear libro (la primera hoja de un libro nuevo tiene sheetId 0)
+        sh = cliente.llamar('create', cliente.gc.create, titulo_libro)
         
-        # Fijar encabezado
-        worksheet.freeze(rows=1)
+        # Título, encabezados, formato y fila fija en un solo batchUpdate
+        cliente.llamar('batch_update', sh.batch_update, {'requests': solicitudes_plantilla()})
         
         # Compartir (opcional)
-        sh.share('', perm_type='anyone', role='reader')
+        cliente.llamar('share', sh.share, '', perm_type='anyone', role='reader')
         
         print(f"✅ Plantilla creada: {sh.url}\n")
         return sh.id
@@ -344,42 +1706,13 @@ def rellenar_sheets(gc, spreadsheet_id: str, datos_lista: List[Dict]) -> None:
     """Rellena la plantilla de Sheets con los datos."""
     try:
         print("📥 Rellenando Google Sheets...\n")
-        sh = gc.open_by_key(spreadsheet_id)
-        worksheet = sh.sheet1
-        
-        for i, datos in enumerate(datos_lista, 1):
-            partes = [
-                *datos['tesoros_biblia'],
-                *datos['seamos_maestros'],
-                *datos['vida_cristiana']
-            ]
-            partes.sort(key=lambda x: x['numero'])
-            
-            # Rellenar fila
-            fila = [
-                i,
-                datos['fecha'],
-                datos['lectura_biblica'],
-                datos['cancion_inicial'],
-                datos['palabras_introduccion'],
-            ]
-            
-            # Agregar partes (máximo 9)
-            for j in range(9):
-                if j < len(partes):
-                    fila.append(partes[j]['titulo'])
-                    fila.append(partes[j]['duracion'])
-                else:
-                    fila.append('')
-                    fila.append('')
-            
-            fila.extend([
-                datos['cancion_intermedia'],
-                datos['palabras_conclusion'],
-                datos['cancion_final']
-            ])
-            
-            worksheet.append_row(fila)
+        cliente = asegurar_cliente(gc)
+        sh = cliente.llamar('open_by_key', cliente.gc.open_by_key, spreadsheet_id)
+        worksheet = cliente.llamar('sheet1', lambda: sh.sheet1)
+        
+        # Todas las filas en una sola llamada
+        filas = [construir_fila(i, datos) for i, datos in enumerate(datos_lista, 1)]
+        cliente.llamar('append_rows', worksheet.append_rows, filas)
         
         print(f"✅ {len(datos_lista)} semanas añadidas a Sheets\n")
         print(f"📊 Accede aquí: {sh.url}\n")
@@ -388,26 +1721,140 @@ def rellenar_sheets(gc, spreadsheet_id: str, datos_lista: List[Dict]) -> None:
         print(f"❌ Error al rellenar Sheets: {e}")
         return None
 
-def crear_plantilla_excel_local(nombre: str = "plantilla_reuniones.xlsx") -> None:
-    """Crea una plantilla Excel vacía para descargar."""
+def _columna_a1(columna: int) -> str:
+    """Convierte un número de columna (desde 1) a letras de notación A1."""
+    letras = ''
+    while columna > 0:
+        columna, resto = divmod(columna - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+def extraer_id_spreadsheet(referencia: str) -> str:
+    """Acepta una URL de Google Sheets o un ID y retorna el ID."""
+    match = re.search(r'/spreadsheets/d/([a-zA-Z0-9_-]+)', referencia)
+    return match.group(1) if match else referencia.strip()
+
+def calcular_cambios_sheets(valores: List[List[str]], datos_lista: List[Dict]) -> Tuple[List[Dict], int, int, int]:
+    """Compara la hoja actual con los datos extraídos usando fecha y año como clave.
+    
+    Retorna (rangos a escribir, celdas modificadas, filas nuevas, última fila usada).
+    """
+    encabezados = construir_encabezados()
+    ancho = len(encabezados)
+    rangos = []
+    
+    # Una hoja vacía recibe primero los encabezados
+    if not valores:
+        rangos.append({'range': f'A1:{_columna_a1(ancho)}1', 'values': [encabezados]})
+        valores = [encabezados]
+    elif len(valores[0]) < ancho:
+        # Hoja creada antes de que existieran las últimas columnas
+        rangos.append({
+            'range': f'{_columna_a1(len(valores[0]) + 1)}1:{_columna_a1(ancho)}1',
+            'values': [encabezados[len(valores[0]):]]
+        })
+    
+    # La fecha visible no lleva año, así que la clave es (fecha, año de inicio).
+    # Las filas sin 'Inicio Semana' (escritas por versiones anteriores) solo
+    # pueden emparejarse por la fecha visible; al actualizarlas reciben la columna.
+    col_inicio = encabezados.index('Inicio Semana')
+    filas_por_semana = {}
+    for num_fila, fila in enumerate(valores[1:], 2):
+        if len(fila) > 1 and fila[1]:
+            inicio = fila[col_inicio] if len(fila) > col_inicio else ''
+            filas_por_semana[(fila[1], inicio[:4] or None)] = num_fila
+    
+    # La última aparición de cada semana gana, conservando el orden original
+    # Los marcadores de semanas sin extraer no se escriben en una hoja existente
+    por_semana = {}
+    for datos in datos_lista:
+        if datos.get('fecha') and not datos.get('_pendiente'):
+            inicio = fecha_inicio_semana(datos)
+            por_semana[(datos['fecha'], str(inicio.year) if inicio else None)] = datos
+    
+    celdas_cambiadas = 0
+    filas_nuevas = []
+    siguiente_semana = len(valores)
+    
+    for (fecha, anio), datos in por_semana.items():
+        num_fila = filas_por_semana.get((fecha, anio)) or filas_por_semana.get((fecha, None))
+        
+        if num_fila is None:
+            filas_nuevas.append(construir_fila(siguiente_semana + len(filas_nuevas), datos))
+            continue
+        
+        actual = valores[num_fila - 1] + [''] * ancho
+        nueva = construir_fila(0, datos)
+        
+        # Agrupar celdas contiguas modificadas (la columna 'Semana' se conserva)
+        col = 1
+        while col < ancho:
+            if str(nueva[col]) == actual[col]:
+                col += 1
+                continue
+            inicio = col
+            while col < ancho and str(nueva[col]) != actual[col]:
+                col += 1
+            rangos.append({
+                'range': f'{_columna_a1(inicio + 1)}{num_fila}:{_columna_a1(col)}{num_fila}',
+                'values': [nueva[inicio:col]]
+            })
+            celdas_cambiadas += col - inicio
+    
+    ultima_fila = len(valores) + len(filas_nuevas)
+    if filas_nuevas:
+        primera = len(valores) + 1
+        rangos.append({
+            'range': f'A{primera}:{_columna_a1(ancho)}{ultima_fila}',
+            'values': filas_nuevas
+        })
+    
+    return rangos, celdas_cambiadas, len(filas_nuevas), ultima_fila
+
+def sincronizar_sheets(gc, spreadsheet_id: str, datos_lista: List[Dict]) -> bool:
+    """Actualiza una hoja existente escribiendo solo celdas cambiadas y filas nuevas.
+    
+    Retorna True si la hoja quedó sincronizada.
+    """
     try:
-        print(f"📝 Creando plantilla Excel: '{nombre}'...\n")
+        print("🔄 Sincronizando Google Sheets...\n")
+        cliente = asegurar_cliente(gc)
+        sh = cliente.llamar('open_by_key', cliente.gc.open_by_key, spreadsheet_id)
+        worksheet = cliente.llamar('sheet1', lambda: sh.sheet1)
         
-        encabezados = [
-            'Semana', 'Fecha', 'Lectura Bíblica',
-            'Canción Inicial', 'Palabras Introducción',
-        ]
+        # Una sola lectura de toda la hoja
+        valores = cliente.llamar('get_all_values', worksheet.get_all_values)
+        rangos, celdas, nuevas, ultima_fila = calcular_cambios_sheets(valores, datos_lista)
         
-        # Agregar 9 pares de columnas para partes
-        for i in range(1, 10):
-            encabezados.extend([f'Parte {i}', f'Duración {i}'])
+        sin_fecha = sum(1 for datos in datos_lista if not datos.get('fecha'))
+        if sin_fecha:
+            print(f"⚠️ {sin_fecha} semanas sin fecha se omitieron")
         
-        encabezados.extend([
-            'Canción Intermedia', 'Palabras Conclusión', 'Canción Final'
-        ])
+        if not rangos:
+            print("✅ La hoja ya está al día\n")
+            return True
+        
+        if ultima_fila > worksheet.row_count:
+            cliente.llamar('add_rows', worksheet.add_rows, ultima_fila - worksheet.row_count)
+        
+        # Una sola escritura por lotes con todos los rangos
+        cliente.llamar('batch_update', worksheet.batch_update, rangos, value_input_option='RAW')
+        
+        print(f"✅ {celdas} celdas actualizadas, {nuevas} semanas nuevas\n")
+        print(f"📊 Accede aquí: {sh.url}\n")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error al sincronizar Sheets: {e}")
+        return False
+
+def crear_plantilla_excel_local(nombre: str = "plantilla_reuniones.xlsx") -> None:
+    """Crea una plantilla Excel vacía para descargar."""
+    try:
+        print(f"📝 Creando plantilla Excel: '{nombre}'...\n")
         
         # Crear DataFrame vacío
-        df = pd.DataFrame(columns=encabezados)
+        df = pd.DataFrame(columns=construir_encabezados())
         
         # Guardar en Excel con formato
         with pd.ExcelWriter(nombre, engine='openpyxl') as writer:
@@ -440,37 +1887,866 @@ def crear_plantilla_excel_local(nombre: str = "plantilla_reuniones.xlsx") -> Non
     except Exception as e:
         print(f"❌ Error al crear Excel: {e}")
 
-# ==================== FUNCIÓN PRINCIPAL ====================
-def main():
-    """Función principal con opción de crear plantilla."""
-    print("\n" + "="*70)
-    print("🚀 EXTRACTOR DE REUNIONES JW.ORG")
-    print("="*70)
-    print()
+# ==================== TABLA DE PARTES E INFORME ====================
+def construir_tabla_partes(datos_todas: List[Dict]) -> pd.DataFrame:
+    """Tabla larga con una fila por parte (sin el límite de 9 de la tabla ancha)."""
+    # La fecha de inicio se calcula una vez por semana, no una vez por parte
+    inicios = [fecha_inicio_semana(datos) for datos in datos_todas]
+    filas = [
+        (semana, datos['fecha'], inicio, seccion, posicion, parte['numero'],
+         parte['titulo'], parte['duracion'])
+        for semana, (datos, inicio) in enumerate(zip(datos_todas, inicios), 1)
+        for seccion in ('tesoros_biblia', 'seamos_maestros', 'vida_cristiana')
+        for posicion, parte in enumerate(datos[seccion], 1)
+    ]
+    partes = pd.DataFrame(filas, columns=[
+        'semana', 'fecha', 'inicio', 'seccion', 'posicion', 'numero', 'titulo', 'duracion'
+    ])
+    partes['inicio'] = pd.to_datetime(partes['inicio'])
+    partes['minutos'] = pd.to_numeric(partes['duracion'].str.extract(r'(\d+)', expand=False)).fillna(0).astype(int)
+    return partes.drop(columns='duracion')
+
+def construir_tabla_canciones(datos_todas: List[Dict]) -> pd.DataFrame:
+    """Tabla larga con una fila por canción cantada."""
+    inicios = [fecha_inicio_semana(datos) for datos in datos_todas]
+    filas = [
+        (semana, inicio, momento, datos[f'cancion_{momento}'])
+        for semana, (datos, inicio) in enumerate(zip(datos_todas, inicios), 1)
+        for momento in ('inicial', 'intermedia', 'final')
+        if datos.get(f'cancion_{momento}')
+    ]
+    canciones = pd.DataFrame(filas, columns=['semana', 'inicio', 'momento', 'cancion'])
+    canciones['inicio'] = pd.to_datetime(canciones['inicio'])
+    canciones['numero'] = pd.to_numeric(canciones['cancion'].str.extract(r'(\d+)', expand=False)).astype('Int64')
+    return canciones.drop(columns='cancion')
+
+def generar_informe_analitico(partes: pd.DataFrame, canciones: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Informe vectorizado: minutos por sección y mes, frecuencia de canciones y tipos de parte."""
+    minutos_mes = (
+        partes.groupby([partes['inicio'].dt.to_period('M').rename('mes'), 'seccion'])['minutos']
+        .sum().unstack(fill_value=0).reset_index()
+    )
+    minutos_mes['mes'] = minutos_mes['mes'].astype(str)
+    minutos_mes.columns.name = None
     
-    # Opción 1: Solo descargar plantilla Excel
-    print("¿Qué deseas hacer?")
-    print("1. Descargar plantilla Excel vacía")
-    print("2. Extraer datos a Google Sheets (requiere autenticación)")
-    print("3. Extraer datos a Excel local")
-    print()
+    frecuencia = (
+        canciones['numero'].value_counts()
+        .rename_axis('cancion').reset_index(name='veces')
+        .sort_values(['veces', 'cancion'], ascending=[False, True], ignore_index=True)
+    )
+    
+    # Los títulos se repiten mucho: se clasifican solo los valores únicos
+    patron_tipos = '^(' + '|'.join(re.escape(tipo) for tipo in TIPOS_PARTE) + ')'
+    codigos, titulos_unicos = pd.factorize(partes['titulo'])
+    tipos_unicos = pd.Series(titulos_unicos).str.extract(patron_tipos, flags=re.IGNORECASE, expand=False).fillna('Otra')
+    tipos = (
+        partes.assign(tipo=tipos_unicos.to_numpy()[codigos])
+        .groupby(['seccion', 'tipo'], as_index=False)
+        .agg(partes=('titulo', 'size'), minutos=('minutos', 'sum'))
+        .sort_values(['seccion', 'partes'], ascending=[True, False], ignore_index=True)
+    )
+    
+    return {
+        'Minutos por mes': minutos_mes,
+        'Frecuencia canciones': frecuencia,
+        'Tipos de parte': tipos,
+    }
+
+def exportar_informe(datos_todas: List[Dict], nombre_archivo: str) -> None:
+    """Guarda la tabla de partes y el informe analítico en un Excel aparte."""
+    datos_reales = [datos for datos in datos_todas if not datos.get('_pendiente')]
+    partes = construir_tabla_partes(datos_reales)
+    informe = generar_informe_analitico(partes, construir_tabla_canciones(datos_reales))
+    
+    with pd.ExcelWriter(nombre_archivo, engine='openpyxl') as writer:
+        partes.to_excel(writer, sheet_name='Partes', index=False)
+        for hoja, df in informe.items():
+            df.to_excel(writer, sheet_name=hoja, index=False)
+    
+    print(f"📈 Informe analítico creado: {nombre_archivo}\n")
+
+def exportar_excel(datos_todas: List[Dict], nombre_archivo: str = "reuniones_datos.xlsx") -> None:
+    """Guarda las reuniones extraídas en un archivo Excel con formato."""
+    print(f"💾 Generando {nombre_archivo}...\n")
+    
+    with pd.ExcelWriter(nombre_archivo, engine='openpyxl') as writer:
+        filas = [construir_fila(i, datos) for i, datos in enumerate(datos_todas, 1)]
+        
+        df = pd.DataFrame(filas, columns=construir_encabezados())
+        df.to_excel(writer, sheet_name='Reuniones', index=False)
+        
+        # Tabla larga: una fila por parte, sin truncar
+        construir_tabla_partes(datos_todas).to_excel(writer, sheet_name='Partes', index=False)
+        
+        # Formatear el Excel
+        _formatear_hoja_reuniones(writer.sheets['Reuniones'])
+    
+    print(f"✅ Excel creado: {nombre_archivo}\n")
     
     if IN_COLAB:
-        opcion = input("Selecciona opción (1-3): ").strip()
+        files.download(nombre_archivo)
+
+def _formatear_hoja_reuniones(worksheet) -> None:
+    """Encabezado azul y anchos de columna de la hoja 'Reuniones'."""
+    from openpyxl.styles import PatternFill, Font, Alignment
+    
+    # Encabezado azul
+    fill = PatternFill(start_color='1F4E78', end_color='1F4E78', fill_type='solid')
+    font = Font(bold=True, color='FFFFFF')
+    
+    for cell in worksheet[1]:
+        cell.fill = fill
+        cell.font = font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+    
+    # Ajustar anchos de columna
+    worksheet.column_dimensions['A'].width = 10
+    worksheet.column_dimensions['B'].width = 20
+    worksheet.column_dimensions['C'].width = 25
+
+# ==================== ESCRITURA EN SEGUNDO PLANO ====================
+class SumideroSheets:
+    """Destino de micro-lotes: agrega filas a una hoja de Google Sheets."""
+    
+    def __init__(self, gc, spreadsheet_id: str):
+        self.cliente = asegurar_cliente(gc)
+        self.sh = self.cliente.llamar('open_by_key', self.cliente.gc.open_by_key, spreadsheet_id)
+        self.worksheet = self.cliente.llamar('sheet1', lambda: self.sh.sheet1)
+    
+    def escribir(self, lote: List[Tuple[int, Dict]]) -> None:
+        filas = [construir_fila(i, datos) for i, datos in lote]
+        self.cliente.llamar('append_rows', self.worksheet.append_rows, filas)
+    
+    def cerrar(self) -> None:
+        print(f"📊 Accede aquí: {self.sh.url}\n")
+        self.cliente.mostrar_resumen()
+
+class SumideroExcel:
+    """Destino de micro-lotes: agrega filas a un libro openpyxl y lo guarda al cerrar."""
+    
+    def __init__(self, nombre_archivo: str):
+        from openpyxl import Workbook
+        self.nombre_archivo = nombre_archivo
+        self.workbook = Workbook()
+        self.worksheet = self.workbook.active
+        self.worksheet.title = 'Reuniones'
+        self.worksheet.append(construir_encabezados())
+        self.datos: List[Dict] = []
+    
+    def escribir(self, lote: List[Tuple[int, Dict]]) -> None:
+        for i, datos in lote:
+            self.worksheet.append(construir_fila(i, datos))
+            self.datos.append(datos)
+    
+    def cerrar(self) -> None:
+        _formatear_hoja_reuniones(self.worksheet)
+        partes = construir_tabla_partes(self.datos)
+        hoja_partes = self.workbook.create_sheet('Partes')
+        hoja_partes.append(list(partes.columns))
+        for fila in partes.itertuples(index=False):
+            hoja_partes.append([v.to_pydatetime() if isinstance(v, pd.Timestamp) else v for v in fila])
+        self.workbook.save(self.nombre_archivo)
+        print(f"✅ Excel creado: {self.nombre_archivo}\n")
+        
+        if IN_COLAB:
+            files.download(self.nombre_archivo)
+
+class EscritorFondo:
+    """Hilo que exporta semanas en micro-lotes mientras continúa la extracción.
+    
+    Recibe (posición, datos) en cualquier orden por una cola acotada y los
+    entrega al sumidero en el orden de `enlaces` (cronológico): una semana solo
+    se escribe cuando todas las anteriores ya llegaron. `datos` None marca una
+    semana fallida que se omite.
+    """
+    
+    _FIN = object()
+    
+    def __init__(self, sumidero, titulos: Optional[List[str]] = None, tam_lote: int = 10,
+                 espera_lote: float = 2.0, max_cola: int = 50):
+        self.sumidero = sumidero
+        self.titulos = titulos
+        self.tam_lote = tam_lote
+        self.espera_lote = espera_lote
+        self.cola: queue.Queue = queue.Queue(maxsize=max_cola)
+        self.error: Optional[Exception] = None
+        self.escritas = 0
+        self.hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self.hilo.start()
+    
+    def enviar(self, posicion: int, datos: Optional[Dict]) -> None:
+        """Encola una semana; bloquea si la cola está llena (contrapresión)."""
+        self.cola.put((posicion, datos))
+    
+    def cerrar(self) -> None:
+        """Espera a que se escriba todo lo encolado y cierra el sumidero."""
+        self.cola.put(self._FIN)
+        self.hilo.join()
+        if self.error:
+            raise self.error
+        self.sumidero.cerrar()
+    
+    def _vaciar(self, lote: List[Tuple[int, Dict]]) -> None:
+        if lote and not self.error:
+            try:
+                self.sumidero.escribir(lote)
+                self.escritas += len(lote)
+            except Exception as e:
+                # Se sigue consumiendo la cola para no bloquear la extracción
+                self.error = e
+        lote.clear()
+    
+    def _trabajar(self) -> None:
+        siguiente = 1
+        en_espera: Dict[int, Optional[Dict]] = {}
+        lote: List[Tuple[int, Dict]] = []
+        
+        while True:
+            try:
+                item = self.cola.get(timeout=self.espera_lote)
+            except queue.Empty:
+                self._vaciar(lote)
+                continue
+            if item is self._FIN:
+                break
+            
+            posicion, datos = item
+            en_espera[posicion] = datos
+            while siguiente in en_espera:
+                datos = en_espera.pop(siguiente)
+                siguiente += 1
+                self._agregar(lote, datos)
+            if len(lote) >= self.tam_lote:
+                self._vaciar(lote)
+        
+        # Lo que quede (huecos que nunca llegaron) se escribe igualmente en orden
+        for posicion in sorted(en_espera):
+            self._agregar(lote, en_espera[posicion])
+        self._vaciar(lote)
+    
+    def _agregar(self, lote: List[Tuple[int, Dict]], datos: Optional[Dict]) -> None:
+        if datos:
+            if self.titulos:
+                enriquecer_canciones(datos, self.titulos)
+            lote.append((self.escritas + len(lote) + 1, datos))
+
+# ==================== EXPORTACIÓN A VARIOS DESTINOS ====================
+def cargar_destinos(ruta: str) -> List[Dict]:
+    """Lee la lista de destinos desde un JSON.
+    
+    Ejemplo: [{"nombre": "Norte", "sheets": "<URL o ID>", "cuota_por_minuto": 30},
+              {"nombre": "Sur", "excel": "sur.xlsx"}]
+    """
+    with open(ruta, encoding='utf-8') as f:
+        destinos = json.load(f)
+    
+    for destino in destinos:
+        if 'sheets' not in destino and 'excel' not in destino:
+            raise ValueError(f"Destino sin 'sheets' ni 'excel': {destino}")
+        destino.setdefault('nombre', destino.get('sheets') or destino.get('excel'))
+    return destinos
+
+def exportar_destino(destino: Dict, datos_todas: List[Dict], gc=None) -> Dict:
+    """Exporta a un solo destino y retorna su resultado sin propagar errores."""
+    inicio = time.monotonic()
+    resultado = {'nombre': destino['nombre'], 'ok': False, 'error': '', 'llamadas': 0}
+    
+    try:
+        if 'sheets' in destino:
+            if gc is None:
+                raise RuntimeError("sin conexión a Google Sheets")
+            # Cada destino tiene su propio cliente y su propia cuota
+            cliente = ClienteSheets(
+                asegurar_cliente(gc).gc,
+                por_minuto=destino.get('cuota_por_minuto', SHEETS_CUOTA_POR_MINUTO)
+            )
+            try:
+                resultado['ok'] = sincronizar_sheets(cliente, extraer_id_spreadsheet(destino['sheets']), datos_todas)
+            finally:
+                resultado['llamadas'] = cliente.total_llamadas()
+            if not resultado['ok']:
+                resultado['error'] = "falló la sincronización"
+        else:
+            exportar_excel(datos_todas, destino['excel'])
+            resultado['ok'] = True
+    except Exception as e:
+        resultado['error'] = str(e)
+    
+    resultado['segundos'] = time.monotonic() - inicio
+    return resultado
+
+def exportar_destinos(datos_todas: List[Dict], destinos: List[Dict], gc=None) -> List[Dict]:
+    """Exporta los mismos datos a todos los destinos en paralelo, un hilo por destino."""
+    print(f"📤 Exportando a {len(destinos)} destinos en paralelo...\n")
+    inicio = time.monotonic()
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(destinos))) as executor:
+        resultados = list(executor.map(lambda d: exportar_destino(d, datos_todas, gc), destinos))
+    
+    print("="*70)
+    print("📤 RESULTADO POR DESTINO")
+    print("="*70)
+    for r in resultados:
+        estado = "✅" if r['ok'] else f"❌ {r['error']}"
+        llamadas = f", {r['llamadas']} llamadas API" if r['llamadas'] else ""
+        print(f"  {r['nombre']}: {r['segundos']:.2f} s{llamadas} {estado}")
+    exitosos = sum(1 for r in resultados if r['ok'])
+    print(f"\n  {exitosos}/{len(resultados)} destinos en {time.monotonic() - inicio:.2f} s")
+    print("="*70 + "\n")
+    
+    return resultados
+
+# ==================== MODO VIGILANCIA ====================
+def _huella_datos(datos: Dict) -> str:
+    """Hash del contenido de una semana, independiente del orden de las claves."""
+    return hashlib.sha256(json.dumps(datos, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def cargar_estado_vigilancia(ruta: str) -> Dict:
+    """Carga el estado del vigilante (validadores del índice y título y hash de cada semana)."""
+    if not os.path.exists(ruta):
+        return {'indice': {}, 'semanas': {}}
+    with open(ruta, encoding='utf-8') as f:
+        estado = json.load(f)
+    for vista in estado['semanas'].values():
+        if 'datos' in vista:  # Estado de versiones anteriores, con los datos completos
+            vista['hash'] = _huella_datos(vista.pop('datos'))
+    return estado
+
+def guardar_estado_vigilancia(estado: Dict, ruta: str) -> None:
+    """Guarda el estado de forma atómica (archivo temporal + reemplazo)."""
+    tmp = f"{ruta}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+def consultar_indice_condicional(url_indice: str, validadores: Dict) -> Tuple[Optional[List[Dict[str, str]]], Dict]:
+    """Consulta el índice con If-None-Match/If-Modified-Since.
+    
+    Retorna (None, validadores) si no cambió; si cambió, los enlaces y los
+    validadores nuevos (que el llamador guarda cuando termina de procesarlos).
+    """
+    cabeceras = dict(HEADERS)
+    if validadores.get('etag'):
+        cabeceras['If-None-Match'] = validadores['etag']
+    if validadores.get('last_modified'):
+        cabeceras['If-Modified-Since'] = validadores['last_modified']
+    
+    response = requests.get(url_indice, headers=cabeceras, timeout=TIMEOUT)
+    if response.status_code == 304:
+        return None, validadores
+    response.raise_for_status()
+    
+    # Si el servidor ignora los validadores, el hash del cuerpo evita reprocesar
+    huella = hashlib.sha256(response.content).hexdigest()
+    nuevos = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'hash': huella
+    }
+    if huella == validadores.get('hash'):
+        return None, nuevos
+    
+    return extraer_enlaces_html(response.content, url_indice), nuevos
+
+def vigilar(url_indice: str, destinos: List[Dict], gc=None, intervalo: int = INTERVALO_VIGILANCIA,
+            ruta_estado: str = ARCHIVO_ESTADO_VIGILANCIA, hilos: int = 1,
+            titulos: Optional[List[str]] = None, ciclos: Optional[int] = None,
+            ruta_json: str = ARCHIVO_DATOS_JSON) -> None:
+    """Consulta el índice periódicamente y extrae/exporta solo semanas nuevas o cambiadas.
+    
+    El estado guarda solo los validadores del índice y el título y hash de cada
+    semana; los datos completos viven en `ruta_json`, que se lee únicamente
+    cuando el índice cambia. Una consulta sin cambios no escribe nada.
+    """
+    estado = cargar_estado_vigilancia(ruta_estado)
+    print(f"👀 Vigilando {url_indice} cada {intervalo} s (Ctrl+C para detener)\n")
+    
+    ciclo = 0
+    while ciclos is None or ciclo < ciclos:
+        ciclo += 1
+        try:
+            enlaces, validadores = consultar_indice_condicional(url_indice, estado['indice'])
+            
+            if enlaces is None:
+                # Solo se escribe si el servidor cambió los validadores (p. ej. un ETag nuevo)
+                if validadores != estado['indice']:
+                    estado['indice'] = validadores
+                    guardar_estado_vigilancia(estado, ruta_estado)
+                print(f"💤 [{datetime.now():%H:%M}] Sin cambios en el índice")
+            else:
+                vistas = estado['semanas']
+                almacenados = {datos.get('_url'): datos for datos in cargar_datos_json(ruta_json)}
+                # También se extraen las semanas que faltan en el JSON o no coinciden con su hash
+                nuevas = [
+                    e for e in enlaces
+                    if vistas.get(e['url'], {}).get('titulo') != e['titulo']
+                    or e['url'] not in almacenados
+                    or _huella_datos(almacenados[e['url']]) != vistas[e['url']].get('hash')
+                ]
+                print(f"🆕 [{datetime.now():%H:%M}] {len(nuevas)} semanas nuevas o cambiadas\n")
+                
+                errores = []
+                if nuevas:
+                    datos_nuevos, errores = procesar_semanas(nuevas, hilos=hilos)
+                    if any(datos.get('_pendiente') for datos in datos_nuevos):
+                        errores.append("semanas sin extraer")
+                    datos_nuevos = [datos for datos in datos_nuevos if not datos.get('_pendiente')]
+                    
+                    titulo_de = {e['url']: e['titulo'] for e in nuevas}
+                    cambiadas = 0
+                    for datos in datos_nuevos:
+                        if titulos:
+                            enriquecer_canciones(datos, titulos)
+                        url, huella = datos['_url'], _huella_datos(datos)
+                        if url not in almacenados or huella != vistas.get(url, {}).get('hash'):
+                            cambiadas += 1
+                        vistas[url] = {'titulo': titulo_de[url], 'hash': huella}
+                        almacenados[url] = datos
+                    
+                    if cambiadas:
+                        datos_todas = [almacenados[e['url']] for e in enlaces if e['url'] in almacenados]
+                        guardar_datos_json(datos_todas, ruta_json)
+                        exportar_destinos(datos_todas, destinos, gc)
+                
+                # Con fallos se conservan los validadores viejos para reintentar en la próxima consulta
+                if not errores:
+                    estado['indice'] = validadores
+                guardar_estado_vigilancia(estado, ruta_estado)
+                
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            print(f"❌ Error al consultar el índice: {e}")
+        
+        if ciclos is None or ciclo < ciclos:
+            time.sleep(intervalo)
+
+# ==================== REFERENCIAS BÍBLICAS ====================
+VERSICULO_FINAL = 999  # "hasta el final del capítulo"
+
+class Referencia(NamedTuple):
+    """Lectura normalizada: id de libro (1-66) y capítulo/versículo de inicio y fin."""
+    libro: int
+    capitulo_inicio: int
+    versiculo_inicio: int
+    capitulo_fin: int
+    versiculo_fin: int
+    
+    @property
+    def inicio(self) -> int:
+        """Clave entera LLLCCCVVV del primer versículo."""
+        return self.libro * 1_000_000 + self.capitulo_inicio * 1000 + self.versiculo_inicio
+    
+    @property
+    def fin(self) -> int:
+        """Clave entera LLLCCCVVV del último versículo."""
+        return self.libro * 1_000_000 + self.capitulo_fin * 1000 + self.versiculo_fin
+    
+    def capitulos(self) -> Tuple[int, int]:
+        """Capítulos cubiertos como posiciones globales (0-1188), inclusive."""
+        base = _PRIMER_CAPITULO[self.libro - 1] - 1
+        return base + self.capitulo_inicio, base + self.capitulo_fin
+    
+    def texto(self) -> str:
+        nombre = LIBROS_CANONICOS[self.libro - 1][0]
+        if self.versiculo_inicio == 1 and self.versiculo_fin == VERSICULO_FINAL:
+            if self.capitulo_inicio == self.capitulo_fin:
+                return f"{nombre} {self.capitulo_inicio}"
+            return f"{nombre} {self.capitulo_inicio}-{self.capitulo_fin}"
+        fin = (f"{self.versiculo_fin}" if self.capitulo_fin == self.capitulo_inicio
+               else f"{self.capitulo_fin}:{self.versiculo_fin}")
+        return f"{nombre} {self.capitulo_inicio}:{self.versiculo_inicio}-{fin}"
+
+def _normalizar_nombre(texto: str) -> str:
+    """Mayúsculas sin tildes y con espacios simples ('Isaías' -> 'ISAIAS')."""
+    sin_tildes = ''.join(c for c in unicodedata.normalize('NFD', texto) if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', sin_tildes.upper()).strip()
+
+_ID_LIBRO = {_normalizar_nombre(nombre): i for i, (nombre, _) in enumerate(LIBROS_CANONICOS, 1)}
+_ID_LIBRO.update({'CANTAR DE LOS CANTARES': 22, 'EL CANTAR DE LOS CANTARES': 22, 'SALMO': 19})
+
+_PRIMER_CAPITULO = [sum(c for _, c in LIBROS_CANONICOS[:i]) for i in range(len(LIBROS_CANONICOS))]
+TOTAL_CAPITULOS = sum(capitulos for _, capitulos in LIBROS_CANONICOS)
+
+_PATRON_REFERENCIA = re.compile(
+    r'(?:([123])\s*)?([A-Z][A-Z ]*?)\s*(\d+)(?::(\d+))?(?:\s*[-–]\s*(\d+)(?::(\d+))?)?'
+)
+
+def parsear_referencia(texto: str) -> Optional[Referencia]:
+    """Convierte 'ISAÍAS 40-41', '1 SAMUEL 5:1-6:3' o 'JUDAS 1-25' en una Referencia.
+    
+    Retorna None si el libro no se reconoce (o es un libro numerado sin su
+    número, como 'SAMUEL 5') o si los capítulos no existen.
+    """
+    match = _PATRON_REFERENCIA.match(_normalizar_nombre(texto))
+    if not match:
+        return None
+    numero, nombre, c1, v1, x, y = match.groups()
+    libro = _ID_LIBRO.get(f"{numero} {nombre.strip()}" if numero else nombre.strip())
+    if not libro:
+        return None
+    
+    c1, v1, x, y = (int(n) if n else None for n in (c1, v1, x, y))
+    if LIBROS_CANONICOS[libro - 1][1] == 1 and v1 is None and x is not None and y is None:
+        c1, v1 = 1, c1  # Libros de un solo capítulo: 'JUDAS 1-25' son versículos ('ABDÍAS 1' es el capítulo)
+    
+    if v1 is None:
+        ref = Referencia(libro, c1, 1, x or c1, y or VERSICULO_FINAL)
+    elif x is None:
+        ref = Referencia(libro, c1, v1, c1, v1)
+    elif y is None:
+        ref = Referencia(libro, c1, v1, c1, x)
     else:
-        opcion = "3"
+        ref = Referencia(libro, c1, v1, x, y)
     
-    if opcion == "1":
-        crear_plantilla_excel_local("plantilla_reuniones.xlsx")
-        print("💡 Descarga la plantilla, llénala manualmente y luego:")
-        print("   1. Sube el archivo a Colab")
-        print("   2. Importa los datos")
-        return
+    if not 1 <= ref.capitulo_inicio <= ref.capitulo_fin <= LIBROS_CANONICOS[libro - 1][1] or ref.fin < ref.inicio:
+        return None
+    return ref
+
+class IndiceIntervalos:
+    """Árbol de intervalos estático sobre claves enteras.
     
-    # Obtener datos
-    URL_INDICE = input("Ingresar URL: ")
+    Los intervalos se ordenan por inicio y cada nodo del árbol implícito
+    (el punto medio de su rango) guarda el mayor fin de su subárbol, así que
+    una consulta cuesta O(log n + k) para k resultados.
+    """
+    
+    def __init__(self, intervalos: List[Tuple[int, int, int]]):
+        intervalos = sorted(intervalos)
+        self.inicios = [a for a, _, _ in intervalos]
+        self.fines = [b for _, b, _ in intervalos]
+        self.valores = [v for _, _, v in intervalos]
+        self.max_fin = [0] * len(intervalos)
+        self._construir(0, len(intervalos))
+    
+    def _construir(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        medio = (lo + hi) // 2
+        self.max_fin[medio] = max(self.fines[medio], self._construir(lo, medio), self._construir(medio + 1, hi))
+        return self.max_fin[medio]
+    
+    def solapados(self, a: int, b: int) -> List[int]:
+        """Valores de los intervalos que se cruzan con [a, b], por inicio."""
+        resultado: List[int] = []
+        self._consultar(0, len(self.inicios), a, b, resultado)
+        return resultado
+    
+    def _consultar(self, lo: int, hi: int, a: int, b: int, resultado: List[int]) -> None:
+        if lo >= hi:
+            return
+        medio = (lo + hi) // 2
+        if self.max_fin[medio] < a:
+            return  # Nada en este subárbol llega hasta a
+        self._consultar(lo, medio, a, b, resultado)
+        if self.inicios[medio] <= b:
+            if self.fines[medio] >= a:
+                resultado.append(self.valores[medio])
+            self._consultar(medio + 1, hi, a, b, resultado)
+
+# ==================== API DE LECTURA ====================
+def guardar_datos_json(datos_todas: List[Dict], ruta: str = ARCHIVO_DATOS_JSON) -> None:
+    """Guarda las reuniones en JSON de forma atómica para la API de lectura."""
+    tmp = f"{ruta}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(datos_todas, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+def cargar_datos_json(ruta: str = ARCHIVO_DATOS_JSON) -> List[Dict]:
+    """Lee las reuniones guardadas por `guardar_datos_json` ([] si no hay archivo válido)."""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            datos_todas = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return datos_todas if isinstance(datos_todas, list) else []
+
+def _json_bytes(objeto) -> Tuple[bytes, str]:
+    """Serializa a JSON y calcula su ETag."""
+    cuerpo = json.dumps(objeto, ensure_ascii=False).encode('utf-8')
+    return cuerpo, f'"{hashlib.sha1(cuerpo).hexdigest()}"'
+
+class IndiceProgramas:
+    """Índice en memoria de las reuniones por fecha de inicio, canción y lectura bíblica.
+    
+    Las respuestas de cada semana se serializan una sola vez al construir el
+    índice; las consultas son búsquedas binarias, accesos a diccionario o
+    consultas al árbol de intervalos de lecturas.
+    """
+    
+    def __init__(self, datos_todas: List[Dict]):
+        semanas = []
+        for datos in datos_todas:
+            inicio = fecha_inicio_semana(datos)
+            if inicio and not datos.get('_pendiente'):
+                semanas.append((inicio, {**datos, 'inicio': inicio.isoformat()}))
+        semanas.sort(key=lambda x: x[0])
+        
+        self.inicios = [inicio.toordinal() for inicio, _ in semanas]
+        self.semanas = [datos for _, datos in semanas]
+        
+        self.referencias: List[Optional[Referencia]] = []
+        for datos in self.semanas:
+            ref = parsear_referencia(datos.get('lectura_biblica', ''))
+            if ref:
+                datos['lectura_ref'] = list(ref)
+            self.referencias.append(ref)
+        self.lecturas = IndiceIntervalos([
+            (ref.inicio, ref.fin, i) for i, ref in enumerate(self.referencias) if ref
+        ])
+        
+        self.respuestas = [_json_bytes(datos) for datos in self.semanas]
+        
+        self.por_cancion: Dict[int, List[int]] = {}
+        for i, datos in enumerate(self.semanas):
+            for clave in ('cancion_inicial', 'cancion_intermedia', 'cancion_final'):
+                match = PATRONES['cancion'].match(datos.get(clave, ''))
+                if match:
+                    self.por_cancion.setdefault(int(match.group(1)), []).append(i)
+    
+    def semana_de(self, dia: date) -> Optional[int]:
+        """Posición de la semana que contiene `dia`."""
+        i = bisect.bisect_right(self.inicios, dia.toordinal()) - 1
+        if i >= 0 and dia.toordinal() - self.inicios[i] < 7:
+            return i
+        return None
+    
+    def rango(self, desde: date, hasta: date) -> List[Dict]:
+        """Semanas que empiezan entre `desde` y `hasta` (inclusive)."""
+        i = bisect.bisect_left(self.inicios, desde.toordinal())
+        j = bisect.bisect_right(self.inicios, hasta.toordinal())
+        return self.semanas[i:j]
+    
+    def cancion(self, numero: int) -> List[Dict]:
+        """Semanas en las que se canta la canción indicada."""
+        return [self.semanas[i] for i in self.por_cancion.get(numero, [])]
+    
+    def lectura(self, ref: Referencia) -> List[Dict]:
+        """Semanas cuya lectura se cruza con `ref`, en orden cronológico."""
+        return [self.semanas[i] for i in sorted(self.lecturas.solapados(ref.inicio, ref.fin))]
+    
+    def cobertura(self, desde: date, hasta: date) -> Dict:
+        """Capítulos de la Biblia leídos en las semanas entre `desde` y `hasta`.
+        
+        Un capítulo cuenta como leído aunque la lectura cubra solo parte de él.
+        """
+        i = bisect.bisect_left(self.inicios, desde.toordinal())
+        j = bisect.bisect_right(self.inicios, hasta.toordinal())
+        tramos = sorted(ref.capitulos() for ref in self.referencias[i:j] if ref)
+        
+        # Unión de tramos de capítulos
+        unidos: List[List[int]] = []
+        for a, b in tramos:
+            if unidos and a <= unidos[-1][1] + 1:
+                unidos[-1][1] = max(unidos[-1][1], b)
+            else:
+                unidos.append([a, b])
+        leidos = sum(b - a + 1 for a, b in unidos)
+        
+        pendientes = []
+        for libro, (nombre, capitulos) in enumerate(LIBROS_CANONICOS):
+            a = _PRIMER_CAPITULO[libro]
+            b = a + capitulos - 1
+            k = bisect.bisect_right(unidos, [a, TOTAL_CAPITULOS]) - 1
+            if k < 0 or unidos[k][1] < b:
+                pendientes.append(nombre)
+        
+        return {
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'semanas': j - i,
+            'semanas_sin_referencia': sum(1 for ref in self.referencias[i:j] if not ref),
+            'capitulos_leidos': leidos,
+            'capitulos_total': TOTAL_CAPITULOS,
+            'porcentaje': round(100 * leidos / TOTAL_CAPITULOS, 1),
+            'libros_completos': len(LIBROS_CANONICOS) - len(pendientes),
+            'libros_pendientes': pendientes,
+        }
+
+class ManejadorLectura(BaseHTTPRequestHandler):
+    """Endpoints JSON: /semanas/actual, /semanas/AAAA-MM-DD, /semanas?desde=&hasta=, /canciones/N,
+    /lecturas?ref=ISAÍAS 40 y /cobertura?desde=&hasta=."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        indice = self.server.indice  # Referencia fija durante toda la petición
+        url = urlparse(self.path)
+        partes = [p for p in url.path.split('/') if p]
+        
+        try:
+            if len(partes) == 2 and partes[0] == 'semanas':
+                dia = date.today() if partes[1] == 'actual' else date.fromisoformat(partes[1])
+                i = indice.semana_de(dia)
+                if i is None:
+                    return self._responder(404, *_json_bytes({'error': 'semana no encontrada'}))
+                return self._responder(200, *indice.respuestas[i])
+            
+            if partes == ['semanas']:
+                consulta = parse_qs(url.query)
+                desde = date.fromisoformat(consulta.get('desde', ['0001-01-01'])[0])
+                hasta = date.fromisoformat(consulta.get('hasta', ['9999-12-31'])[0])
+                return self._responder(200, *_json_bytes(indice.rango(desde, hasta)))
+            
+            if len(partes) == 2 and partes[0] == 'canciones':
+                return self._responder(200, *_json_bytes(indice.cancion(int(partes[1]))))
+            
+            if partes == ['lecturas']:
+                texto = parse_qs(url.query).get('ref', [''])[0]
+                ref = parsear_referencia(texto)
+                if ref is None:
+                    raise ValueError(f"referencia no reconocida: {texto!r}")
+                return self._responder(200, *_json_bytes(indice.lectura(ref)))
+            
+            if partes == ['cobertura']:
+                consulta = parse_qs(url.query)
+                desde = date.fromisoformat(consulta.get('desde', ['0001-01-01'])[0])
+                hasta = date.fromisoformat(consulta.get('hasta', ['9999-12-31'])[0])
+                return self._responder(200, *_json_bytes(indice.cobertura(desde, hasta)))
+            
+            if partes == ['salud']:
+                return self._responder(200, *_json_bytes({'semanas': len(indice.semanas), 'cargado': self.server.cargado}))
+        except ValueError as e:
+            return self._responder(400, *_json_bytes({'error': str(e)}))
+        
+        self._responder(404, *_json_bytes({'error': 'ruta no encontrada'}))
+    
+    def _responder(self, codigo: int, cuerpo: bytes, etag: str) -> None:
+        if codigo == 200 and self.headers.get('If-None-Match') == etag:
+            codigo, cuerpo = 304, b''
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    def log_message(self, formato, *args):
+        pass
+
+class ServidorLectura(ThreadingHTTPServer):
+    """Servidor de la API que recarga el índice cuando cambia el archivo JSON."""
+    
+    daemon_threads = True
     
-    enlaces = obtener_enlaces_semanas(URL_INDICE)
+    def __init__(self, ruta_json: str, puerto: int = PUERTO_API, host: str = '127.0.0.1'):
+        super().__init__((host, puerto), ManejadorLectura)
+        self.ruta_json = ruta_json
+        self.mtime = None
+        self.indice = IndiceProgramas([])
+        self.cargado = None
+        self.recargar_si_cambio()
+    
+    def recargar_si_cambio(self) -> bool:
+        """Construye un índice nuevo y lo publica con una sola asignación."""
+        try:
+            mtime = os.stat(self.ruta_json).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.mtime:
+            return False
+        
+        with open(self.ruta_json, encoding='utf-8') as f:
+            nuevo = IndiceProgramas(json.load(f))
+        self.indice, self.mtime = nuevo, mtime
+        self.cargado = datetime.now().isoformat(timespec='seconds')
+        print(f"🔄 Índice cargado: {len(nuevo.semanas)} semanas")
+        return True
+    
+    def vigilar_archivo(self, intervalo: float = 1.0) -> None:
+        """Hilo que revisa el archivo y recarga el índice sin detener el servidor."""
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.recargar_si_cambio()
+            except Exception as e:
+                print(f"❌ Error al recargar {self.ruta_json}: {e}")
+
+def servir_programas(ruta_json: str = ARCHIVO_DATOS_JSON, puerto: int = PUERTO_API) -> None:
+    """Levanta la API de lectura hasta Ctrl+C."""
+    servidor = ServidorLectura(ruta_json, puerto)
+    threading.Thread(target=servidor.vigilar_archivo, daemon=True).start()
+    print(f"🌐 API de lectura en http://127.0.0.1:{servidor.server_address[1]}/semanas/actual")
+    print("   Ctrl+C para detener\n")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido")
+    finally:
+        servidor.server_close()
+
+# ==================== FUNCIÓN PRINCIPAL ====================
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Lee las opciones de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Extractor de reuniones JW.org")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanuda desde el checkpoint omitiendo las semanas ya extraídas")
+    parser.add_argument('--checkpoint', default=ARCHIVO_CHECKPOINT,
+                        help=f"Ruta del diario de checkpoint (default: {ARCHIVO_CHECKPOINT})")
+    parser.add_argument('--url', help="URL índice de la guía de actividades (evita la pregunta)")
+    parser.add_argument('--opcion', choices=['1', '2', '3', '4'],
+                        help="Opción del menú a ejecutar sin preguntar")
+    parser.add_argument('--salida', default="reuniones_datos.xlsx",
+                        help="Archivo Excel de salida (default: reuniones_datos.xlsx)")
+    parser.add_argument('--hilos', type=int, default=1,
+                        help="Semanas descargadas en paralelo (default: 1)")
+    parser.add_argument('--cancionero', nargs='?', const='', default=None, metavar='ARCHIVO',
+                        help="Agrega títulos de canciones (desde ARCHIVO, o del índice en línea con caché)")
+    parser.add_argument('--destinos', metavar='JSON',
+                        help="Exporta en paralelo a la lista de hojas/archivos del JSON indicado")
+    parser.add_argument('--vigilar', action='store_true',
+                        help="Modo vigilancia: consulta el índice periódicamente y exporta solo semanas nuevas")
+    parser.add_argument('--intervalo', type=int, default=INTERVALO_VIGILANCIA,
+                        help=f"Segundos entre consultas en modo vigilancia (default: {INTERVALO_VIGILANCIA})")
+    parser.add_argument('--estado', default=ARCHIVO_ESTADO_VIGILANCIA,
+                        help=f"Archivo de estado del modo vigilancia (default: {ARCHIVO_ESTADO_VIGILANCIA})")
+    parser.add_argument('--json', default=ARCHIVO_DATOS_JSON,
+                        help=f"Copia JSON de las reuniones extraídas (default: {ARCHIVO_DATOS_JSON})")
+    parser.add_argument('--servir', action='store_true',
+                        help="Sirve las reuniones del archivo --json como API HTTP local")
+    parser.add_argument('--puerto', type=int, default=PUERTO_API,
+                        help=f"Puerto de la API de lectura (default: {PUERTO_API})")
+    parser.add_argument('--escritura-fondo', action='store_true',
+                        help="Exporta en micro-lotes desde un hilo mientras continúa la extracción")
+    parser.add_argument('--informe', action='store_true',
+                        help="Genera <salida>_informe.xlsx con la tabla de partes y el análisis")
+    parser.add_argument('--plazo', type=float, metavar='SEGUNDOS',
+                        help="Tiempo máximo de descarga; al vencer se exporta lo completado")
+    parser.add_argument('--extraccion', choices=('texto', 'dom'), default='texto',
+                        help="'dom' recorre la estructura del cuaderno; si no la reconoce, usa el texto (default: texto)")
+    parser.add_argument('--coordinar', metavar='COLA',
+                        help="Reparte las semanas mediante la cola SQLite COLA en lugar de extraerlas aquí")
+    parser.add_argument('--trabajadores', type=int, default=0,
+                        help="Procesos trabajadores locales que lanza el coordinador (default: 0)")
+    parser.add_argument('--trabajador', metavar='COLA',
+                        help="Modo trabajador: extrae semanas de la cola COLA hasta vaciarla")
+    parser.add_argument('--visibilidad', type=float, default=VISIBILIDAD_LEASE,
+                        help=f"Segundos de lease de una semana tomada (default: {VISIBILIDAD_LEASE})")
+    parser.add_argument('--timeout-adaptativo', action='store_true',
+                        help=f"Deriva el timeout de cada petición de las latencias observadas (máx. {TIMEOUT} s)")
+    parser.add_argument('--peticiones-cubiertas', action='store_true',
+                        help="Duplica las peticiones que superan el p95 y usa la primera respuesta")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="Mide la memoria por etapa y por semana con tracemalloc y guarda un reporte")
+    
+    # parse_known_args: Colab/Jupyter pasan sus propios argumentos al kernel
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def ejecutar_extraccion(url_indice: str, opcion: str, args: argparse.Namespace,
+                        perfil: PerfilMemoria) -> Optional[List[Dict]]:
+    """Obtiene las semanas, las extrae y exporta el resultado.
+    
+    El plazo (--plazo) limita la descarga; la exportación siempre se hace
+    con lo que se haya completado.
+    """
+    establecer_plazo(args.plazo)
+    configurar_latencia(args.timeout_adaptativo, args.peticiones_cubiertas, args.hilos)
+    global MODO_EXTRACCION
+    MODO_EXTRACCION = args.extraccion
+    
+    with perfil.etapa('enlaces'):
+        enlaces = obtener_enlaces_semanas(url_indice)
     
     if not enlaces:
         print("❌ No se encontraron semanas")
@@ -478,38 +2754,106 @@ def main():
     
     mostrar_semanas_disponibles(enlaces)
     
-    # Procesar todas las semanas
-    datos_todas = []
-    errores = []
+    titulos = None
+    if args.cancionero is not None:
+        with perfil.etapa('cancionero'):
+            titulos = cargar_cancionero(args.cancionero or None)
     
-    for i, semana in enumerate(enlaces, 1):
+    # Con escritura en segundo plano la exportación empieza con la primera semana
+    escritor = None
+    if args.escritura_fondo and not args.destinos and not args.coordinar:
+        sumidero = crear_sumidero(opcion, args)
+        if sumidero:
+            escritor = EscritorFondo(sumidero, titulos)
+    
+    # Procesar todas las semanas
+    if args.coordinar:
+        # La cola SQLite hace de diario: relanzar el coordinador retoma lo pendiente
+        with perfil.etapa('extraccion'):
+            datos_todas, errores = coordinar_semanas(enlaces, args.coordinar, args.trabajadores,
+                                                     args.visibilidad)
+    else:
+        diario = DiarioCheckpoint(args.checkpoint, reanudar=args.resume)
         try:
-            print(f"⏳ [{i}/{len(enlaces)}] {semana['titulo']}...", end=" ")
-            datos = extraer_datos_reunion(semana['url'])
-            
-            if datos:
-                print("✅")
-                datos_todas.append(datos)
-            else:
-                print("❌")
-                errores.append(semana['titulo'])
-                
-        except Exception as e:
-            print(f"❌ ({e})")
-            errores.append(f"{semana['titulo']}: {e}")
+            with perfil.etapa('extraccion'):
+                datos_todas, errores = procesar_semanas(enlaces, diario, hilos=args.hilos, perfil=perfil,
+                                                        escritor=escritor)
+        finally:
+            diario.cerrar()
+    
+    faltantes = [datos for datos in datos_todas if datos.get('_pendiente')]
     
     print()
     print("="*70)
-    print(f"✅ PROCESADAS: {len(datos_todas)}/{len(enlaces)}")
+    print(f"✅ PROCESADAS: {len(datos_todas) - len(faltantes)}/{len(enlaces)}")
     if errores:
         print(f"❌ ERRORES: {len(errores)}")
+    if faltantes:
+        print(f"⏰ SIN EXTRAER (plazo agotado): {len(faltantes)} — marcadas en la salida")
     print("="*70)
     print()
+    LATENCIA_DESCARGA.mostrar_resumen()
     
-    if not datos_todas:
+    if len(faltantes) == len(datos_todas):
         print("❌ No hay datos para guardar")
         return
     
+    if titulos and not escritor:
+        for datos in datos_todas:
+            enriquecer_canciones(datos, titulos)
+    
+    with perfil.etapa('exportacion'):
+        exportado = False
+        if escritor:
+            try:
+                escritor.cerrar()
+                print(f"✅ {escritor.escritas} semanas exportadas en segundo plano\n")
+                exportado = True
+            except Exception as e:
+                print(f"❌ Error en la exportación en segundo plano: {e}")
+                if titulos:
+                    for datos in datos_todas:
+                        enriquecer_canciones(datos, titulos)
+                if isinstance(escritor.sumidero, SumideroSheets):
+                    # Se completa la hoja ya creada en vez de pedir nombre y crear otra
+                    print("   Se completa la hoja ya creada con todo el conjunto\n")
+                    sumidero = escritor.sumidero
+                    sincronizar_sheets(sumidero.cliente, sumidero.sh.id, datos_todas)
+                    exportado = True
+                else:
+                    print("   Se exporta de nuevo todo el conjunto\n")
+        if exportado:
+            guardar_datos_json(datos_todas, args.json)
+        else:
+            exportar_resultados(datos_todas, opcion, args)
+        if args.informe:
+            exportar_informe(datos_todas, f"{os.path.splitext(args.salida)[0]}_informe.xlsx")
+    
+    return datos_todas
+
+def crear_sumidero(opcion: str, args: argparse.Namespace):
+    """Prepara el destino de la escritura en segundo plano según la opción."""
+    if opcion == "2" and SHEETS_DISPONIBLE:
+        gc = conectar_google_sheets()
+        if not gc:
+            return None
+        titulo = input("\n¿Nombre para la hoja de cálculo? (default: Reuniones JW): ").strip()
+        spreadsheet_id = crear_plantilla_sheets(gc, titulo or "Reuniones JW")
+        return SumideroSheets(gc, spreadsheet_id) if spreadsheet_id else None
+    if opcion == "3" or not SHEETS_DISPONIBLE:
+        return SumideroExcel(args.salida)
+    return None  # La sincronización (opción 4) necesita el conjunto completo
+
+def exportar_resultados(datos_todas: List[Dict], opcion: str, args: argparse.Namespace) -> None:
+    """Guarda los datos según la opción elegida o los destinos configurados."""
+    guardar_datos_json(datos_todas, args.json)
+    
+    if args.destinos:
+        destinos = cargar_destinos(args.destinos)
+        gc = conectar_google_sheets() if any('sheets' in d for d in destinos) else None
+        exportar_destinos(datos_todas, destinos, gc)
+        return
+    
     # Guardar según opción
     if opcion == "2" and SHEETS_DISPONIBLE:
         gc = conectar_google_sheets()
@@ -521,67 +2865,82 @@ def main():
             spreadsheet_id = crear_plantilla_sheets(gc, titulo)
             if spreadsheet_id:
                 rellenar_sheets(gc, spreadsheet_id, datos_todas)
+            gc.mostrar_resumen()
+    
+    elif opcion == "4" and SHEETS_DISPONIBLE:
+        gc = conectar_google_sheets()
+        if gc:
+            referencia = input("\n¿URL o ID de la hoja existente?: ").strip()
+            if referencia:
+                sincronizar_sheets(gc, extraer_id_spreadsheet(referencia), datos_todas)
+            gc.mostrar_resumen()
     
     else:
         # Opción 3: Excel local
-        nombre_archivo = "reuniones_datos.xlsx"
-        print(f"💾 Generando {nombre_archivo}...\n")
-        
-        with pd.ExcelWriter(nombre_archivo, engine='openpyxl') as writer:
-            filas = []
-            
-            for i, datos in enumerate(datos_todas, 1):
-                partes = [*datos['tesoros_biblia'], *datos['seamos_maestros'], *datos['vida_cristiana']]
-                partes.sort(key=lambda x: x['numero'])
-                
-                fila = [i, datos['fecha'], datos['lectura_biblica'], datos['cancion_inicial'], datos['palabras_introduccion']]
-                
-                # Agregar partes (máximo 9)
-                for j in range(9):
-                    if j < len(partes):
-                        fila.append(partes[j]['titulo'])
-                        fila.append(partes[j]['duracion'])
-                    else:
-                        fila.append('')
-                        fila.append('')
-                
-                fila.extend([datos['cancion_intermedia'], datos['palabras_conclusion'], datos['cancion_final']])
-                filas.append(fila)
-            
-            encabezados = ['Semana', 'Fecha', 'Lectura Bíblica', 'Canción Inicial', 'Palabras Introducción']
-            
-            # Agregar 9 pares de columnas para partes
-            for i in range(1, 10):
-                encabezados.extend([f'Parte {i}', f'Duración {i}'])
-            
-            encabezados.extend(['Canción Intermedia', 'Palabras Conclusión', 'Canción Final'])
-            
-            df = pd.DataFrame(filas, columns=encabezados)
-            df.to_excel(writer, sheet_name='Reuniones', index=False)
-            
-            # Formatear el Excel
-            from openpyxl.styles import PatternFill, Font, Alignment
-            workbook = writer.book
-            worksheet = writer.sheets['Reuniones']
-            
-            # Encabezado azul
-            fill = PatternFill(start_color='1F4E78', end_color='1F4E78', fill_type='solid')
-            font = Font(bold=True, color='FFFFFF')
-            
-            for cell in worksheet[1]:
-                cell.fill = fill
-                cell.font = font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Ajustar anchos de columna
-            worksheet.column_dimensions['A'].width = 10
-            worksheet.column_dimensions['B'].width = 20
-            worksheet.column_dimensions['C'].width = 25
-        
-        print(f"✅ Excel creado: {nombre_archivo}\n")
-        
-        if IN_COLAB:
-            files.download(nombre_archivo)
+        exportar_excel(datos_todas, args.salida)
+
+def main(args: Optional[argparse.Namespace] = None):
+    """Función principal con opción de crear plantilla."""
+    if args is None:
+        args = parsear_argumentos()
+    
+    if args.servir:
+        servir_programas(args.json, args.puerto)
+        return
+    
+    if args.trabajador:
+        global MODO_EXTRACCION
+        MODO_EXTRACCION = args.extraccion
+        configurar_latencia(args.timeout_adaptativo, args.peticiones_cubiertas)
+        trabajar(args.trabajador, visibilidad=args.visibilidad)
+        return
+    
+    print("\n" + "="*70)
+    print("🚀 EXTRACTOR DE REUNIONES JW.ORG")
+    print("="*70)
+    print()
+    
+    # Opción 1: Solo descargar plantilla Excel
+    print("¿Qué deseas hacer?")
+    print("1. Descargar plantilla Excel vacía")
+    print("2. Extraer datos a Google Sheets (requiere autenticación)")
+    print("3. Extraer datos a Excel local")
+    print("4. Sincronizar una hoja de Google Sheets existente")
+    print()
+    
+    if args.opcion:
+        opcion = args.opcion
+    elif IN_COLAB:
+        opcion = input("Selecciona opción (1-4): ").strip()
+    else:
+        opcion = "3"
+    
+    if opcion == "1":
+        crear_plantilla_excel_local("plantilla_reuniones.xlsx")
+        print("💡 Descarga la plantilla, llénala manualmente y luego:")
+        print("   1. Sube el archivo a Colab")
+        print("   2. Importa los datos")
+        return
+    
+    # Obtener datos
+    URL_INDICE = args.url or input("Ingresar URL: ")
+    
+    if args.vigilar:
+        destinos = cargar_destinos(args.destinos) if args.destinos else [{'nombre': args.salida, 'excel': args.salida}]
+        gc = conectar_google_sheets() if any('sheets' in d for d in destinos) else None
+        titulos = cargar_cancionero(args.cancionero or None) if args.cancionero is not None else None
+        try:
+            vigilar(URL_INDICE, destinos, gc, args.intervalo, args.estado, args.hilos, titulos,
+                    ruta_json=args.json)
+        except KeyboardInterrupt:
+            print("\n👋 Vigilancia detenida")
+        return
+    
+    perfil = PerfilMemoria(activo=args.perfil_memoria)
+    try:
+        return ejecutar_extraccion(URL_INDICE, opcion, args, perfil)
+    finally:
+        perfil.guardar_reporte(f"{os.path.splitext(args.salida)[0]}_memoria.txt")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,717 @@
+"""
+SERVIDOR SIMULADO DE JW.ORG Y PRUEBAS DE CARGA
+
+Sirve páginas índice y de semanas (grabadas o sintéticas) desde un servidor
+HTTP local, con latencia configurable e inyección de fallos (429/503, cuerpos
+lentos y conexiones cortadas). Sobre él, la prueba de carga ejecuta el flujo
+completo de `main()` sin preguntas y reporta rendimiento, latencia de cola y
+reintentos para cada escenario.
+
+USO:
+    python jw_servidor_simulado.py --servir                 # solo el servidor
+    python jw_servidor_simulado.py --carga                  # todos los escenarios
+    python jw_servidor_simulado.py --carga --paginas grabaciones/
+    python jw_servidor_simulado.py --lote 100 1000 5000     # extracción por lotes vs por página
+    python jw_servidor_simulado.py --sheets                 # cliente de Sheets contra un Sheets falso
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import math
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+from bs4 import BeautifulSoup
+
+import jw_extractor_complete as jw
+
+# ==================== CONFIGURACIÓN ====================
+RUTA_BASE = '/es/biblioteca/guia-actividades-reunion-testigos-jehova/'
+RUTA_INDICE = f'{RUTA_BASE}indice-simulado/'
+
+MESES = (
+    'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+    'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
+)
+
+CONFIG_DEFECTO = {
+    'latencia': 'lognormal',     # 'fija', 'uniforme' o 'lognormal'
+    'latencia_media': 0.05,      # segundos
+    'latencia_dispersion': 0.5,  # sigma (lognormal) o ancho relativo (uniforme)
+    'prob_429': 0.0,
+    'prob_503': 0.0,
+    'prob_corte': 0.0,           # cierra la conexión sin responder
+    'prob_lento': 0.0,           # envía el cuerpo en trozos pausados
+    'bytes_por_segundo': 20000,  # velocidad de los cuerpos lentos
+    'prob_rezagado': 0.0,        # respuestas que se quedan atascadas (cola larga)
+    'latencia_rezagado': 3.0,    # segundos extra de una respuesta rezagada
+    'semilla': 1234,
+}
+
+ESCENARIOS = {
+    'base': {},
+    'latencia_alta': {'latencia_media': 0.3, 'latencia_dispersion': 0.9},
+    'errores_429': {'prob_429': 0.15},
+    'errores_503': {'prob_503': 0.15},
+    'cuerpos_lentos': {'prob_lento': 0.2, 'bytes_por_segundo': 8000},
+    'cortes': {'prob_corte': 0.1},
+    'rezagados': {'prob_rezagado': 0.05},
+}
+
+# ==================== PÁGINAS SINTÉTICAS ====================
+def _titulo_semana(inicio: date) -> str:
+    """Título de una semana con el formato de jw.org ('3-9 de marzo')."""
+    fin = inicio + timedelta(days=6)
+    if inicio.month == fin.month:
+        return f"{inicio.day}-{fin.day} de {MESES[inicio.month - 1]}"
+    return f"{inicio.day} de {MESES[inicio.month - 1]} a {fin.day} de {MESES[fin.month - 1]}"
+
+def generar_pagina_semana(inicio: date, rng: random.Random, lectura: Optional[str] = None) -> str:
+    """Genera una página de semana con el marcado del cuaderno de jw.org."""
+    if lectura is None:
+        libro, capitulos = rng.choice(jw.LIBROS_CANONICOS)
+        capitulo = rng.randint(1, capitulos)
+        lectura = f"{libro} {capitulo}-{min(capitulo + 1, capitulos)}"
+    canciones = rng.sample(range(1, 152), 3)
+    maestros = [
+        ('Empiece conversaciones', 3), ('Haga revisitas', 4),
+        ('Haga discípulos', 5), ('Explique sus creencias', 5),
+    ][:rng.randint(3, 4)]
+    
+    partes_maestros = ''.join(
+        f'<h3 class="du-color--gold-700">{n}. {titulo} ({mins} mins.)</h3>'
+        f'<div><p>De casa en casa. Aplique la lección {rng.randint(1, 12)}.</p></div>'
+        for n, (titulo, mins) in enumerate(maestros, 4)
+    )
+    n = 4 + len(maestros)
+    
+    return f'''<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>{_titulo_semana(inicio)}</title></head>
+<body><main>
+<header>
+<h1 id="p1">{_titulo_semana(inicio).upper()}</h1>
+<h2 id="p2"><a href="#">{lectura}</a></h2>
+</header>
+<div class="bodyTxt">
+<div id="section1">
+<h3 class="dc-icon--music">Canción {canciones[0]} y oración | Palabras de introducción (1 min.)</h3>
+</div>
+<div id="section2">
+<h2 class="du-color--teal-700">TESOROS DE LA BIBLIA</h2>
+<h3 class="du-color--teal-700">1. Lecciones de {lectura.title()} (10 mins.)</h3>
+<div><p>Análisis con el auditorio.</p></div>
+<h3 class="du-color--teal-700">2. Busquemos perlas escondidas (10 mins.)</h3>
+<div><p>¿Qué aprendemos de estos capítulos?</p></div>
+<h3 class="du-color--teal-700">3. Lectura de la Biblia (4 mins.)</h3>
+<div><p>Lectura asignada.</p></div>
+</div>
+<div id="section3">
+<h2 class="du-color--gold-700">SEAMOS MEJORES MAESTROS</h2>
+{partes_maestros}
+</div>
+<div id="section4">
+<h2 class="du-color--maroon-600">NUESTRA VIDA CRISTIANA</h2>
+<h3 class="dc-icon--music">Canción {canciones[1]}</h3>
+<h3 class="du-color--maroon-600">{n}. Necesidades de la congregación (15 mins.)</h3>
+<div><p>Discurso a cargo de un anciano.</p></div>
+<h3 class="du-color--maroon-600">{n + 1}. Estudio bíblico de la congregación (30 mins.)</h3>
+<div><p>Capítulo {rng.randint(1, 30)}.</p></div>
+<h3 class="dc-icon--music">Palabras de conclusión (3 mins.) | Canción {canciones[2]} y oración</h3>
+</div>
+</div>
+</main></body></html>'''
+
+def generar_paginas_sinteticas(num_semanas: int = 40, anio: int = 2025, semilla: int = 7) -> Dict[str, bytes]:
+    """Genera un índice y `num_semanas` páginas de semanas consecutivas.
+    
+    Las lecturas siguen un plan continuo desde Génesis 1 (2 a 5 capítulos por
+    semana, sin pasar de un libro a otro).
+    """
+    rng = random.Random(semilla)
+    inicio = date(anio, 1, 6)
+    paginas = {}
+    enlaces = []
+    libro, capitulo = 0, 1
+    
+    for i in range(num_semanas):
+        lunes = inicio + timedelta(weeks=i)
+        ruta = f'{RUTA_BASE}simulado-{lunes.year}-mwb/semana-{i + 1:03d}/'
+        
+        nombre, capitulos = jw.LIBROS_CANONICOS[libro]
+        fin = min(capitulo + rng.randint(1, 4), capitulos)
+        lectura = f"{nombre} {capitulo}" if fin == capitulo else f"{nombre} {capitulo}-{fin}"
+        libro, capitulo = ((libro + 1) % len(jw.LIBROS_CANONICOS), 1) if fin == capitulos else (libro, fin + 1)
+        
+        paginas[ruta] = generar_pagina_semana(lunes, rng, lectura).encode('utf-8')
+        enlaces.append(f'<li><a href="{ruta}">{_titulo_semana(lunes)}</a></li>')
+    
+    indice = (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"></head><body><main>'
+        f'<div class="docPart"><ul>{"".join(enlaces)}</ul></div></main></body></html>'
+    )
+    paginas[RUTA_INDICE] = indice.encode('utf-8')
+    return paginas
+
+def cargar_paginas_grabadas(directorio: str) -> Dict[str, bytes]:
+    """Carga páginas grabadas: `indice.html` y una página por semana (*.html).
+    
+    Las semanas conservan su ruta relativa bajo la de jw.org, así que una
+    grabación `enero-febrero-2025-mwb/Vida-y-ministerio-6-12-enero.html` (o
+    `.../Vida-y-ministerio-6-12-enero/index.html`) se sirve en
+    `RUTA_BASE + 'enero-febrero-2025-mwb/Vida-y-ministerio-6-12-enero/'`,
+    la misma ruta a la que apuntan los enlaces del índice grabado.
+    """
+    paginas = {}
+    for carpeta, subcarpetas, archivos in os.walk(directorio):
+        subcarpetas.sort()
+        for nombre in sorted(archivos):
+            if not nombre.endswith('.html'):
+                continue
+            ruta_archivo = os.path.join(carpeta, nombre)
+            relativa = os.path.relpath(ruta_archivo, directorio).replace(os.sep, '/')
+            with open(ruta_archivo, 'rb') as f:
+                contenido = f.read()
+            if relativa == 'indice.html':
+                paginas[RUTA_INDICE] = contenido
+                continue
+            relativa = relativa[:-len('.html')]
+            if relativa.endswith('/index'):
+                relativa = relativa[:-len('/index')]
+            paginas[f'{RUTA_BASE}{relativa}/'] = contenido
+    return paginas
+
+# ==================== SERVIDOR SIMULADO ====================
+def muestrear_latencia(config: Dict, rng: random.Random) -> float:
+    """Toma una latencia de la distribución configurada."""
+    media = config['latencia_media']
+    dispersion = config['latencia_dispersion']
+    if config['latencia'] == 'fija':
+        return media
+    if config['latencia'] == 'uniforme':
+        return max(0.0, rng.uniform(media * (1 - dispersion), media * (1 + dispersion)))
+    # Lognormal con la media indicada
+    mu = math.log(media) - dispersion ** 2 / 2
+    return rng.lognormvariate(mu, dispersion)
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    """Responde a las peticiones aplicando latencia y fallos configurados."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        servidor = self.server
+        config = servidor.config
+        ruta = unquote(self.path.split('?', 1)[0].split('#', 1)[0])
+        
+        with servidor.lock:
+            latencia = muestrear_latencia(config, servidor.rng)
+            azar = servidor.rng.random()
+            lento = servidor.rng.random() < config['prob_lento']
+            rezagado = servidor.rng.random() < config['prob_rezagado']
+        
+        # Los fallos solo se inyectan en las semanas; sin índice no hay ejecución que medir
+        if ruta == RUTA_INDICE:
+            azar, rezagado = 1.0, False
+        
+        if rezagado:
+            servidor.contar('rezagado')
+            latencia += config['latencia_rezagado']
+        time.sleep(latencia)
+        
+        if azar < config['prob_corte']:
+            servidor.contar('corte')
+            self.close_connection = True
+            with contextlib.suppress(OSError):
+                self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        azar -= config['prob_corte']
+        
+        if azar < config['prob_429']:
+            servidor.contar('429')
+            self._responder(429, b'Too Many Requests', {'Retry-After': '1'})
+            return
+        azar -= config['prob_429']
+        
+        if azar < config['prob_503']:
+            servidor.contar('503')
+            self._responder(503, b'Service Unavailable')
+            return
+        
+        cuerpo = servidor.paginas.get(ruta)
+        if cuerpo is None:
+            servidor.contar('404')
+            self._responder(404, b'Not Found')
+            return
+        
+        # Las páginas grabadas apuntan a jw.org; se reescriben hacia este servidor
+        cuerpo = cuerpo.replace(b'https://www.jw.org', servidor.url_base.encode())
+        
+        # Peticiones condicionales, como las que usa el modo vigilancia
+        etag = f'"{hashlib.sha1(cuerpo).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            servidor.contar('304')
+            self._responder(304, b'', {'ETag': etag})
+            return
+        
+        servidor.contar('lento' if lento else '200')
+        self._responder(200, cuerpo, {'ETag': etag}, lento=lento)
+    
+    def _responder(self, codigo: int, cuerpo: bytes, cabeceras: Optional[Dict[str, str]] = None,
+                   lento: bool = False) -> None:
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        
+        if not lento:
+            self.wfile.write(cuerpo)
+            return
+        
+        trozo = 1024
+        pausa = trozo / self.server.config['bytes_por_segundo']
+        for inicio in range(0, len(cuerpo), trozo):
+            self.wfile.write(cuerpo[inicio:inicio + trozo])
+            self.wfile.flush()
+            time.sleep(pausa)
+    
+    def log_message(self, formato, *args):
+        pass  # Silencioso: las métricas se cuentan en el servidor
+
+class ServidorSimulado(ThreadingHTTPServer):
+    """Servidor HTTP local que imita jw.org."""
+    
+    daemon_threads = True
+    
+    def __init__(self, paginas: Dict[str, bytes], config: Optional[Dict] = None, puerto: int = 0):
+        super().__init__(('127.0.0.1', puerto), ManejadorSimulado)
+        self.paginas = paginas
+        self.config = {**CONFIG_DEFECTO, **(config or {})}
+        self.rng = random.Random(self.config['semilla'])
+        self.lock = threading.Lock()
+        self.contadores: Dict[str, int] = {}
+        self.url_base = f'http://127.0.0.1:{self.server_address[1]}'
+        self.url_indice = f'{self.url_base}{RUTA_INDICE}'
+    
+    def contar(self, evento: str) -> None:
+        with self.lock:
+            self.contadores[evento] = self.contadores.get(evento, 0) + 1
+    
+    def handle_error(self, request, client_address):
+        # Clientes que abandonan la descarga (timeouts, plazos) no son errores del servidor
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            self.contar('abandonada')
+            return
+        super().handle_error(request, client_address)
+
+@contextlib.contextmanager
+def servidor_simulado(paginas: Optional[Dict[str, bytes]] = None, config: Optional[Dict] = None, puerto: int = 0):
+    """Levanta el servidor en un hilo y lo detiene al salir del bloque."""
+    servidor = ServidorSimulado(paginas or generar_paginas_sinteticas(), config, puerto)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        yield servidor
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+# ==================== PRUEBA DE CARGA ====================
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+def ejecutar_escenario(nombre: str, config: Dict, paginas: Dict[str, bytes], hilos: int = 1,
+                       timeout: float = jw.TIMEOUT, reintentos: int = jw.MAX_REINTENTOS,
+                       cubiertas: bool = False) -> Dict:
+    """Ejecuta `main()` contra el servidor simulado y retorna sus métricas.
+    
+    Con `cubiertas` se activan los timeouts adaptativos y las peticiones cubiertas.
+    """
+    timeout_original, reintentos_original = jw.TIMEOUT, jw.MAX_REINTENTOS
+    jw.TIMEOUT, jw.MAX_REINTENTOS = timeout, reintentos
+    jw.ESTADISTICAS_DESCARGA.reiniciar()
+    
+    try:
+        with servidor_simulado(paginas, config) as servidor, tempfile.TemporaryDirectory() as tmp:
+            args = jw.parsear_argumentos([
+                '--url', servidor.url_indice, '--opcion', '3', '--hilos', str(hilos),
+                '--salida', os.path.join(tmp, 'reuniones.xlsx'),
+                '--checkpoint', os.path.join(tmp, 'checkpoint.jsonl'),
+                '--json', os.path.join(tmp, 'reuniones.json'),
+            ] + (['--timeout-adaptativo', '--peticiones-cubiertas'] if cubiertas else []))
+            inicio = time.monotonic()
+            with contextlib.redirect_stdout(io.StringIO()):
+                datos = jw.main(args) or []
+            duracion = time.monotonic() - inicio
+            eventos = dict(servidor.contadores)
+    finally:
+        jw.TIMEOUT, jw.MAX_REINTENTOS = timeout_original, reintentos_original
+    
+    intentos = jw.ESTADISTICAS_DESCARGA.intentos
+    latencias = [segundos for _, segundos, _ in intentos]
+    resultados: Dict[str, int] = {}
+    for _, _, resultado in intentos:
+        resultados[resultado] = resultados.get(resultado, 0) + 1
+    
+    return {
+        'escenario': nombre + (' +cub' if cubiertas else ''),
+        'hilos': hilos,
+        'semanas': len(datos),
+        'esperadas': sum(1 for ruta in paginas if ruta != RUTA_INDICE),
+        'segundos': duracion,
+        'semanas_por_segundo': len(datos) / duracion if duracion else 0.0,
+        'p50': _percentil(latencias, 50),
+        'p95': _percentil(latencias, 95),
+        'p99': _percentil(latencias, 99),
+        'max': max(latencias, default=0.0),
+        'intentos': len(intentos),
+        'reintentos': len(intentos) - len({url for url, _, _ in intentos}),
+        'resultados': resultados,
+        'eventos_servidor': eventos,
+        'coberturas': jw.LATENCIA_DESCARGA.coberturas,
+    }
+
+def mostrar_reporte(metricas: List[Dict]) -> None:
+    """Muestra una tabla con las métricas de cada escenario."""
+    print("\n" + "=" * 100)
+    print("📊 PRUEBA DE CARGA")
+    print("=" * 100)
+    print(f"{'escenario':<16}{'hilos':>6}{'semanas':>10}{'seg':>8}{'sem/s':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'reintentos':>12}")
+    for m in metricas:
+        print(f"{m['escenario']:<16}{m['hilos']:>6}{m['semanas']:>5}/{m['esperadas']:<4}{m['segundos']:>8.2f}"
+              f"{m['semanas_por_segundo']:>8.1f}{m['p50'] * 1000:>9.0f}{m['p95'] * 1000:>9.0f}"
+              f"{m['p99'] * 1000:>9.0f}{m['max'] * 1000:>9.0f}{m['reintentos']:>12}")
+    print("=" * 100)
+    for m in metricas:
+        print(f"  {m['escenario']} ({m['hilos']} hilos): cliente={m['resultados']} servidor={m['eventos_servidor']}"
+              + (f" coberturas={m['coberturas']}" if m['coberturas'] else ''))
+    print()
+
+def ejecutar_prueba_carga(paginas: Dict[str, bytes], escenarios: List[str], hilos: List[int],
+                          timeout: float, reintentos: int, cubiertas: bool = False) -> List[Dict]:
+    """Ejecuta cada escenario con cada nivel de concurrencia (y con peticiones cubiertas, si se pide)."""
+    metricas = []
+    for nombre in escenarios:
+        for n in hilos:
+            for cubrir in ((False, True) if cubiertas else (False,)):
+                print(f"⏳ {nombre} con {n} hilos{' y peticiones cubiertas' if cubrir else ''}...")
+                metricas.append(ejecutar_escenario(nombre, ESCENARIOS[nombre], paginas, n, timeout,
+                                                   reintentos, cubrir))
+    mostrar_reporte(metricas)
+    return metricas
+
+# ==================== BENCHMARK DE EXTRACCIÓN POR LOTES ====================
+def ejecutar_benchmark_lote(paginas: Dict[str, bytes], tamanos: List[int]) -> List[Dict]:
+    """Compara `extraer_datos_texto` página a página con `extraer_lote` sobre el mismo corpus.
+    
+    Los textos se obtienen una vez de las páginas y se repiten hasta cada
+    tamaño; se comprueba que ambos caminos den exactamente los mismos datos.
+    """
+    textos = [jw.texto_pagina(BeautifulSoup(cuerpo, 'html.parser'))
+              for ruta, cuerpo in paginas.items() if ruta != RUTA_INDICE]
+    metricas = []
+    for n in tamanos:
+        corpus = (textos * (n // len(textos) + 1))[:n]
+        
+        inicio = time.perf_counter()
+        por_pagina = [jw.extraer_datos_texto(contenido) for contenido in corpus]
+        segundos_pagina = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        por_lote = jw.registros_lote(jw.extraer_lote(corpus))
+        segundos_lote = time.perf_counter() - inicio
+        
+        metricas.append({
+            'paginas': n,
+            'us_pagina': segundos_pagina / n * 1e6,
+            'us_lote': segundos_lote / n * 1e6,
+            'identicos': por_pagina == por_lote,
+        })
+    
+    print("\n" + "=" * 70)
+    print("📊 EXTRACCIÓN POR LOTES")
+    print("=" * 70)
+    print(f"{'páginas':>10}{'µs/pág (una a una)':>22}{'µs/pág (lote)':>16}{'aceleración':>13}  idénticos")
+    for m in metricas:
+        print(f"{m['paginas']:>10}{m['us_pagina']:>22.0f}{m['us_lote']:>16.0f}"
+              f"{m['us_pagina'] / m['us_lote']:>12.1f}x  {'✅' if m['identicos'] else '❌'}")
+    print("=" * 70 + "\n")
+    return metricas
+
+# ==================== GOOGLE SHEETS SIMULADO ====================
+class RelojSimulado:
+    """Reloj manual para `ClienteSheets`: dormir avanza el tiempo sin esperar."""
+    
+    def __init__(self):
+        self.ahora = 0.0
+    
+    def __call__(self) -> float:
+        return self.ahora
+    
+    def dormir(self, segundos: float) -> None:
+        self.ahora += segundos
+
+class ErrorApiSimulado(Exception):
+    """Error con la forma de `gspread.exceptions.APIError` (`response.status_code`)."""
+    
+    def __init__(self, codigo: int, mensaje: str):
+        super().__init__(f"APIError [{codigo}]: {mensaje}")
+        self.response = SimpleNamespace(status_code=codigo)
+
+class HojaSimulada:
+    """Hoja en memoria con las operaciones de gspread que usa el extractor."""
+    
+    def __init__(self, gc: 'GoogleSheetsSimulado', filas: int = 1000):
+        self.gc = gc
+        self.valores: List[List[str]] = []
+        self.row_count = filas
+    
+    def get_all_values(self) -> List[List[str]]:
+        self.gc.api('get_all_values')
+        ancho = max((len(fila) for fila in self.valores), default=0)
+        return [fila + [''] * (ancho - len(fila)) for fila in self.valores]
+    
+    def append_rows(self, filas: List[List]) -> None:
+        self.gc.api('append_rows')
+        self.valores.extend([str(valor) for valor in fila] for fila in filas)
+        self.row_count = max(self.row_count, len(self.valores))
+    
+    def add_rows(self, n: int) -> None:
+        self.gc.api('add_rows')
+        self.row_count += n
+    
+    def batch_update(self, rangos: List[Dict], value_input_option: str = 'RAW') -> None:
+        self.gc.api('batch_update')
+        for rango in rangos:
+            columna, fila = _celda_a1(rango['range'].split(':')[0])
+            for i, valores in enumerate(rango['values']):
+                if fila + i >= self.row_count:
+                    raise ErrorApiSimulado(400, f"{rango['range']} excede los límites de la hoja")
+                self.escribir_fila(fila + i, columna, valores)
+    
+    def escribir_fila(self, fila: int, columna: int, valores: List) -> None:
+        while len(self.valores) <= fila:
+            self.valores.append([])
+        actual = self.valores[fila]
+        actual.extend([''] * (columna + len(valores) - len(actual)))
+        actual[columna:columna + len(valores)] = [str(valor) for valor in valores]
+
+class LibroSimulado:
+    """Libro en memoria con una sola hoja (`sheet1`)."""
+    
+    def __init__(self, gc: 'GoogleSheetsSimulado', id_libro: str, titulo: str):
+        self.gc = gc
+        self.id = id_libro
+        self.title = titulo
+        self.url = f"https://docs.google.com/spreadsheets/d/{id_libro}"
+        self._hoja = HojaSimulada(gc)
+    
+    @property
+    def sheet1(self) -> HojaSimulada:
+        self.gc.api('sheet1')
+        return self._hoja
+    
+    def batch_update(self, cuerpo: Dict) -> None:
+        self.gc.api('batch_update')
+        # Solo importa el contenido: los encabezados de `solicitudes_plantilla`
+        for solicitud in cuerpo['requests']:
+            if 'updateCells' in solicitud:
+                inicio = solicitud['updateCells']['start']
+                for i, fila in enumerate(solicitud['updateCells']['rows']):
+                    valores = [celda['userEnteredValue']['stringValue'] for celda in fila['values']]
+                    self._hoja.escribir_fila(inicio['rowIndex'] + i, inicio['columnIndex'], valores)
+    
+    def share(self, *args, **kwargs) -> None:
+        self.gc.api('share')
+
+def _celda_a1(celda: str) -> tuple:
+    """Convierte 'AB12' en (columna, fila) con base 0."""
+    letras, numero = re.match(r'([A-Z]+)(\d+)$', celda).groups()
+    columna = 0
+    for letra in letras:
+        columna = columna * 26 + ord(letra) - ord('A') + 1
+    return columna - 1, int(numero) - 1
+
+class GoogleSheetsSimulado:
+    """Cliente gspread falso: libros en memoria, cuota por minuto y 429 inyectados.
+    
+    Cada llamada cuenta contra una ventana deslizante de 60 s del reloj dado;
+    si la ventana está llena, o con probabilidad `prob_429`, responde 429 como
+    la API real. Las llamadas rechazadas no consumen cuota.
+    """
+    
+    def __init__(self, reloj, cuota_por_minuto: int = jw.SHEETS_CUOTA_POR_MINUTO,
+                 prob_429: float = 0.0, semilla: int = 7):
+        self.reloj = reloj
+        self.cuota = cuota_por_minuto
+        self.prob_429 = prob_429
+        self.rng = random.Random(semilla)
+        self.libros: Dict[str, LibroSimulado] = {}
+        self.aceptadas: deque = deque()
+        self.contadores = {'llamadas': 0, '429_cuota': 0, '429_inyectado': 0}
+        self.por_operacion: Dict[str, int] = {}
+    
+    def api(self, operacion: str) -> None:
+        """Registra una llamada y decide si se rechaza con 429."""
+        ahora = self.reloj()
+        self.contadores['llamadas'] += 1
+        self.por_operacion[operacion] = self.por_operacion.get(operacion, 0) + 1
+        while self.aceptadas and self.aceptadas[0] + 60 <= ahora:
+            self.aceptadas.popleft()
+        if len(self.aceptadas) >= self.cuota:
+            self.contadores['429_cuota'] += 1
+            raise ErrorApiSimulado(429, "Quota exceeded for 'Write requests per minute per user'")
+        if self.rng.random() < self.prob_429:
+            self.contadores['429_inyectado'] += 1
+            raise ErrorApiSimulado(429, "Rate limit exceeded")
+        self.aceptadas.append(ahora)
+    
+    def create(self, titulo: str) -> LibroSimulado:
+        self.api('create')
+        libro = LibroSimulado(self, f"libro-{len(self.libros) + 1}", titulo)
+        self.libros[libro.id] = libro
+        return libro
+    
+    def open_by_key(self, clave: str) -> LibroSimulado:
+        self.api('open_by_key')
+        if clave not in self.libros:
+            raise ErrorApiSimulado(404, f"Requested entity was not found: {clave}")
+        return self.libros[clave]
+
+def ejecutar_prueba_sheets(paginas: Dict[str, bytes], cuota: int = 20, prob_429: float = 0.2) -> List[Dict]:
+    """Ejecuta las exportaciones a Sheets de `ClienteSheets` contra `GoogleSheetsSimulado`.
+    
+    Con un reloj simulado (sin esperas reales) crea la plantilla, rellena la mitad
+    de las semanas, sincroniza el resto y agrega todas de nuevo en micro-lotes de
+    una semana, primero solo con la cuota y después con 429 inyectados. La cuota
+    por defecto es menor que el número de llamadas para que el limitador actúe.
+    Comprueba que el limitador nunca supere la cuota del servidor, que el
+    contenido final de las hojas sea el esperado y que las llamadas y reintentos
+    que cuenta el cliente coincidan con los que recibió el servidor.
+    """
+    rutas = [ruta for ruta in paginas if ruta != RUTA_INDICE]
+    textos = [jw.texto_pagina(BeautifulSoup(paginas[ruta], 'html.parser')) for ruta in rutas]
+    datos = jw.registros_lote(jw.extraer_lote(textos, [f"https://www.jw.org{ruta}" for ruta in rutas]))
+    mitad = len(datos) // 2
+    encabezados = jw.construir_encabezados()
+    esperadas = [[str(valor) for valor in jw.construir_fila(i, d)] for i, d in enumerate(datos, 1)]
+    
+    metricas = []
+    for nombre, probabilidad in (('cuota', 0.0), ('cuota + 429', prob_429)):
+        reloj = RelojSimulado()
+        gc = GoogleSheetsSimulado(reloj, cuota, probabilidad)
+        cliente = jw.ClienteSheets(gc, por_minuto=cuota, reloj=reloj, dormir=reloj.dormir,
+                                   azar=random.Random(7))
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            id_sincronizado = jw.crear_plantilla_sheets(cliente, 'Prueba sincronizada')
+            jw.rellenar_sheets(cliente, id_sincronizado, datos[:mitad])
+            sincronizado = jw.sincronizar_sheets(cliente, id_sincronizado, datos)
+            
+            id_lotes = jw.crear_plantilla_sheets(cliente, 'Prueba por lotes')
+            sumidero = jw.SumideroSheets(cliente, id_lotes)
+            for i, d in enumerate(datos, 1):
+                sumidero.escribir([(i, d)])
+        
+        hojas_ok = (
+            sincronizado
+            and gc.libros[id_sincronizado]._hoja.valores == [encabezados] + esperadas
+            and gc.libros[id_lotes]._hoja.valores == [encabezados] + esperadas
+        )
+        reintentos = int(sum(est['reintentos'] for est in cliente.estadisticas.values()))
+        rechazadas = gc.contadores['429_cuota'] + gc.contadores['429_inyectado']
+        metricas.append({
+            'escenario': nombre,
+            'llamadas_cliente': cliente.total_llamadas(),
+            'llamadas_servidor': gc.contadores['llamadas'],
+            'reintentos': reintentos,
+            '429_cuota': gc.contadores['429_cuota'],
+            '429_inyectado': gc.contadores['429_inyectado'],
+            'minutos': reloj.ahora / 60,
+            'cuota_ok': gc.contadores['429_cuota'] == 0,
+            'hojas_ok': hojas_ok,
+            'conteos_ok': cliente.total_llamadas() == gc.contadores['llamadas'] and reintentos == rechazadas,
+            'por_operacion': gc.por_operacion,
+        })
+    
+    print("\n" + "=" * 98)
+    print(f"📊 CLIENTE DE SHEETS ({len(datos)} semanas, cuota {cuota}/min)")
+    print("=" * 98)
+    print(f"{'escenario':<14}{'llamadas':>10}{'429 cuota':>11}{'429 inyect.':>13}{'reintentos':>12}"
+          f"{'min simul.':>12}{'cuota':>8}{'hojas':>8}{'conteos':>9}")
+    for m in metricas:
+        print(f"{m['escenario']:<14}{m['llamadas_cliente']:>10}{m['429_cuota']:>11}{m['429_inyectado']:>13}"
+              f"{m['reintentos']:>12}{m['minutos']:>12.1f}{'✅' if m['cuota_ok'] else '❌':>7}"
+              f"{'✅' if m['hojas_ok'] else '❌':>7}"
+              f"{'✅' if m['conteos_ok'] else '❌':>8}")
+    print("=" * 98)
+    for m in metricas:
+        print(f"  {m['escenario']}: servidor={m['por_operacion']}")
+    print()
+    return metricas
+
+# ==================== FUNCIÓN PRINCIPAL ====================
+def main():
+    parser = argparse.ArgumentParser(description="Servidor simulado de jw.org y pruebas de carga")
+    parser.add_argument('--servir', action='store_true', help="Solo levanta el servidor")
+    parser.add_argument('--carga', action='store_true', help="Ejecuta la prueba de carga")
+    parser.add_argument('--paginas', help="Directorio con páginas grabadas (default: sintéticas)")
+    parser.add_argument('--semanas', type=int, default=40, help="Semanas sintéticas a generar")
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--escenarios', nargs='+', default=list(ESCENARIOS), choices=list(ESCENARIOS))
+    parser.add_argument('--hilos', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--reintentos', type=int, default=jw.MAX_REINTENTOS)
+    parser.add_argument('--lote', type=int, nargs='+', metavar='N',
+                        help="Compara la extracción por lotes con la de una página a la vez para N páginas")
+    parser.add_argument('--peticiones-cubiertas', action='store_true',
+                        help="Repite cada escenario con timeouts adaptativos y peticiones cubiertas")
+    parser.add_argument('--sheets', action='store_true',
+                        help="Prueba el cliente de Sheets (cuota, reintentos de 429 y conteos) contra un Sheets falso")
+    args = parser.parse_args()
+    
+    paginas = cargar_paginas_grabadas(args.paginas) if args.paginas else generar_paginas_sinteticas(args.semanas)
+    
+    if args.lote:
+        ejecutar_benchmark_lote(paginas, args.lote)
+        return
+    
+    if args.sheets:
+        ejecutar_prueba_sheets(paginas)
+        return
+    
+    if args.carga:
+        ejecutar_prueba_carga(paginas, args.escenarios, args.hilos, args.timeout, args.reintentos,
+                              args.peticiones_cubiertas)
+        return
+    
+    with servidor_simulado(paginas, puerto=args.puerto) as servidor:
+        print(f"🌐 Servidor simulado en {servidor.url_indice}")
+        print("   Ctrl+C para detener\n")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()